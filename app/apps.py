@@ -1,5 +1,5 @@
 from django.apps import AppConfig
-from django.db.models.signals import post_delete, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 
 
 class AdminappConfig(AppConfig):
@@ -9,16 +9,41 @@ class AdminappConfig(AppConfig):
 
     def ready(self) -> None:
         from common import signals
+        from app.models import wallpaper_dimension_registry, settings_store_cache
 
         post_delete.connect(signals.delete_file_post_delete_function, sender='app.Category', dispatch_uid='CATEGORY_DELETE_FILES_POST_DELETE')
 
         post_delete.connect(signals.delete_file_post_delete_function, sender='app.Wallpaper', dispatch_uid='WALLPAPER_DELETE_FILES_POST_DELETE')
 
+        post_delete.connect(signals.delete_file_post_delete_function, sender='app.WallpaperRendition', dispatch_uid='WALLPAPERRENDITION_DELETE_FILES_POST_DELETE')
+
         post_delete.connect(signals.delete_file_post_delete_function, sender='app.ZipFileStore', dispatch_uid='ZIPFILESTORE_DELETE_FILES_POST_DELETE')
 
+        post_delete.connect(signals.delete_file_post_delete_function, sender='app.ZipFileUpload', dispatch_uid='ZIPFILEUPLOAD_DELETE_FILES_POST_DELETE')
+
+
+        pre_save.connect(signals.snapshot_old_file_pre_save_function, sender='app.Category', dispatch_uid='CATEGORY_SNAPSHOT_OLD_FILES_PRE_SAVE')
+
+        post_save.connect(signals.delete_old_file_post_save_function, sender='app.Category', dispatch_uid='CATEGORY_DELETE_OLD_FILES_POST_SAVE')
+
+        pre_save.connect(signals.snapshot_old_file_pre_save_function, sender='app.Wallpaper', dispatch_uid='WALLPAPER_SNAPSHOT_OLD_FILES_PRE_SAVE')
+
+        post_save.connect(signals.delete_old_file_post_save_function, sender='app.Wallpaper', dispatch_uid='WALLPAPER_DELETE_OLD_FILES_POST_SAVE')
+
+        pre_save.connect(signals.snapshot_old_file_pre_save_function, sender='app.WallpaperRendition', dispatch_uid='WALLPAPERRENDITION_SNAPSHOT_OLD_FILES_PRE_SAVE')
+
+        post_save.connect(signals.delete_old_file_post_save_function, sender='app.WallpaperRendition', dispatch_uid='WALLPAPERRENDITION_DELETE_OLD_FILES_POST_SAVE')
+
+        pre_save.connect(signals.snapshot_old_file_pre_save_function, sender='app.ZipFileStore', dispatch_uid='ZIPFILESTORE_SNAPSHOT_OLD_FILES_PRE_SAVE')
+
+        post_save.connect(signals.delete_old_file_post_save_function, sender='app.ZipFileStore', dispatch_uid='ZIPFILESTORE_DELETE_OLD_FILES_POST_SAVE')
+
+
+        post_save.connect(wallpaper_dimension_registry.invalidate_on_commit, sender='app.WallpaperDimension', dispatch_uid='WALLPAPERDIMENSION_INVALIDATE_REGISTRY_POST_SAVE')
+
+        post_delete.connect(wallpaper_dimension_registry.invalidate_on_commit, sender='app.WallpaperDimension', dispatch_uid='WALLPAPERDIMENSION_INVALIDATE_REGISTRY_POST_DELETE')
 
-        pre_save.connect(signals.delete_old_file_pre_save_function, sender='app.Category', dispatch_uid='CATEGORY_DELETE_OLD_FILES_PRE_SAVE')
 
-        pre_save.connect(signals.delete_old_file_pre_save_function, sender='app.Wallpaper', dispatch_uid='WALLPAPER_DELETE_OLD_FILES_PRE_SAVE')
+        post_save.connect(settings_store_cache.invalidate_on_commit, sender='app.SettingsStore', dispatch_uid='SETTINGSSTORE_INVALIDATE_CACHE_POST_SAVE')
 
-        pre_save.connect(signals.delete_old_file_pre_save_function, sender='app.ZipFileStore', dispatch_uid='ZIPFILESTORE_DELETE_OLD_FILES_PRE_SAVE')
+        post_delete.connect(settings_store_cache.invalidate_on_commit, sender='app.SettingsStore', dispatch_uid='SETTINGSSTORE_INVALIDATE_CACHE_POST_DELETE')
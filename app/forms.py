@@ -1,5 +1,38 @@
+import base64
+import binascii
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+import uuid
 from django import forms
-from app.models import ZipFileStore
+from django.core.exceptions import ValidationError
+from app.models import Category, Wallpaper, WallpaperDimension, WallpaperTag, ZipFileStore
+
+
+class MultipleUUIDField(forms.Field):
+    widget = forms.MultipleHiddenInput
+    default_error_messages = {
+        'invalid': 'Enter a list of valid UUIDs.',
+        'too_many': 'Ensure at most %(max_count)s UUIDs are given.',
+    }
+
+
+    def __init__(self, *, max_count: int, **kwargs: Any) -> None:
+        self.max_count = max_count
+        super().__init__(**kwargs)
+
+
+    def to_python(self, value: Sequence[str] | None) -> list[uuid.UUID]:
+        if not value:
+            return []
+        
+        if len(value) > self.max_count:
+            raise ValidationError(self.error_messages['too_many'], code='too_many', params={'max_count': self.max_count})
+
+        try:
+            return list(dict.fromkeys(uuid.UUID(item) for item in value))
+        except ValueError:
+            raise ValidationError(self.error_messages['invalid'], code='invalid')
 
 
 class ZipFileStoreModelForm(forms.ModelForm[ZipFileStore]):
@@ -11,6 +44,52 @@ class ZipFileStoreModelForm(forms.ModelForm[ZipFileStore]):
 
 
 class ProgressForm(forms.Form):
-    process_uuid = forms.CharField(
+    process_uuid = MultipleUUIDField(
         required=True,
+        max_count=100,
+    )
+
+
+class WallpaperGalleryForm(forms.Form):
+    template_name = 'app/forms/wallpaper_gallery_form.html'
+
+    dimension = forms.ModelChoiceField(
+        queryset=WallpaperDimension.objects.order_by('width', 'height'),
+        required=False,
     )
+    category = forms.ModelChoiceField(
+        queryset=Category.objects.order_by('name'),
+        required=False,
+    )
+    tag = forms.ModelChoiceField(
+        queryset=WallpaperTag.objects.order_by('value'),
+        required=False,
+    )
+    cursor = forms.CharField(
+        required=False,
+        widget=forms.HiddenInput,
+    )
+
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.fields['dimension'].label_from_instance = lambda dimension: f'{dimension.width} x {dimension.height}' # type: ignore[attr-defined]
+        self.fields['category'].label_from_instance = lambda category: category.name # type: ignore[attr-defined]
+        self.fields['tag'].label_from_instance = lambda tag: tag.value # type: ignore[attr-defined]
+
+
+    def clean_cursor(self) -> tuple[datetime, uuid.UUID] | None:
+        cursor = self.cleaned_data['cursor']
+        if not cursor:
+            return None
+
+        try:
+            created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('_')
+            return datetime.fromisoformat(created_at), uuid.UUID(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise ValidationError('Invalid cursor.', code='invalid_cursor')
+
+
+    @staticmethod
+    def encode_cursor(wallpaper: Wallpaper) -> str:
+        return base64.urlsafe_b64encode(f'{wallpaper.created_at.isoformat()}_{wallpaper.uuid.hex}'.encode()).decode()
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkuploadprocess',
+            name='total_files',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0002_bulkuploadprocess_total_files'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkuploadprocess',
+            name='zip_file_store',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='processes', to='app.zipfilestore'),
+        ),
+        migrations.AddField(
+            model_name='zipfilestore',
+            name='manifest',
+            field=models.JSONField(default=list, editable=False),
+        ),
+    ]
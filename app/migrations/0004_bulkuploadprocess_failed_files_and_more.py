@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_bulkuploadprocess_zip_file_store_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkuploadprocess',
+            name='failed_files',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='bulkuploadprocess',
+            name='finished_files',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:31
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_bulkuploadprocess_failed_files_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkuploadprocess',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='bulkuploadprocesserror',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_bulkuploadprocess_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bulkuploadprocess',
+            name='started_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
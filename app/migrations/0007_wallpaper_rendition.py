@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:41
+
+import common.image_utils
+import common.unique_file_path_generators
+import common.validators
+import django.db.models.deletion
+import pathlib
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_alter_bulkuploadprocess_started_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WallpaperRendition',
+            fields=[
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('image', models.ImageField(max_length=256, unique=True, upload_to=common.unique_file_path_generators.UniqueFilePathGenerator(pathlib.PurePosixPath('wallpapers'), 'rendition'), validators=[common.validators.MaxFileSizeValidator(512000), common.validators.ImageFormatAndFileExtensionsValidator((common.image_utils.ImageFormat['WEBP'],))], verbose_name='auto_delete_fileauto_delete_old_file')),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('file_size', models.PositiveIntegerField()),
+                ('wallpaper', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renditions', to='app.wallpaper')),
+            ],
+            options={
+                'ordering': ['width'],
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(fields=('wallpaper', 'width'), name='unique_wallpaper_rendition_width')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_zip_archive_validator'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallpaper',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, help_text='SHA-256 hex digest of the image file.', max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_wallpaper_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallpaper',
+            name='perceptual_hash',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='64-bit difference hash of the image, stored signed.', null=True),
+        ),
+        migrations.AddField(
+            model_name='wallpaper',
+            name='perceptual_hash_band_0',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='wallpaper',
+            name='perceptual_hash_band_1',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='wallpaper',
+            name='perceptual_hash_band_2',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='wallpaper',
+            name='perceptual_hash_band_3',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:53
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_wallpaper_perceptual_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallpaper',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='wallpaper',
+            index=models.Index(fields=['-created_at', '-uuid'], name='wallpaper_gallery_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wallpaper',
+            index=models.Index(fields=['dimension', '-created_at', '-uuid'], name='wallpaper_dim_gallery_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wallpaper',
+            index=models.Index(fields=['wallpaper_group', '-created_at', '-uuid'], name='wallpaper_group_gallery_idx'),
+        ),
+    ]
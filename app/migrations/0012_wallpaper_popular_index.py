@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_wallpaper_created_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wallpaper',
+            index=models.Index(fields=['-download_count', '-uuid'], name='wallpaper_popular_idx'),
+        ),
+    ]
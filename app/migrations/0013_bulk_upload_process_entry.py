@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:10
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_wallpaper_popular_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkUploadProcessEntry',
+            fields=[
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=1024)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('process', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='app.bulkuploadprocess')),
+                ('wallpaper', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='app.wallpaper')),
+            ],
+            options={
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(fields=('process', 'name'), name='unique_process_entry_name')],
+            },
+        ),
+    ]
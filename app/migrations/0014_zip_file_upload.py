@@ -0,0 +1,37 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:14
+
+import common.signals
+import common.unique_file_path_generators
+import django.core.validators
+import pathlib
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0013_bulk_upload_process_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZipFileUpload',
+            fields=[
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('file', models.FileField(max_length=64, upload_to=common.unique_file_path_generators.UniqueFilePathGenerator(pathlib.PurePosixPath('zip_files'), 'zip'), verbose_name=common.signals.SignalEffect['AUTO_DELETE_FILE'])),
+                ('length', models.PositiveBigIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(524288000)])),
+                ('offset', models.PositiveBigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='zipfilestore',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, help_text='SHA-256 hex digest of the zip file, when it was uploaded in chunks.', max_length=64, null=True),
+        ),
+    ]
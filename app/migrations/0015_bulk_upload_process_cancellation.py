@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0014_zip_file_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkuploadprocess',
+            name='status',
+            field=models.CharField(choices=[('running', 'Running'), ('cancelled', 'Cancelled')], default='running', editable=False, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='bulkuploadprocess',
+            name='total_batches',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:18
+
+from django.apps.registry import Apps
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+
+
+def complete_finished_processes(apps: Apps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    BulkUploadProcess = apps.get_model('app', 'BulkUploadProcess')
+    BulkUploadProcess.objects.filter(status='running', finished_files__gte=models.F('total_files')).update(
+        status='completed',
+        finished_at=models.F('updated_at'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0015_bulk_upload_process_cancellation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkuploadprocess',
+            name='failed_batches',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='bulkuploadprocess',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='bulkuploadprocess',
+            name='status',
+            field=models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='running', editable=False, max_length=16),
+        ),
+        migrations.RunPython(complete_finished_processes, migrations.RunPython.noop),
+    ]
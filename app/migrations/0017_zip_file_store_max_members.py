@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:31
+
+import common.unique_file_path_generators
+import common.validators
+import django.core.validators
+import pathlib
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0016_bulk_upload_process_outcome'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='zipfilestore',
+            name='zip_file',
+            field=models.FileField(help_text='Upload a zip file containing wallpapers that does not exceed 500 MB.', max_length=64, unique=True, upload_to=common.unique_file_path_generators.UniqueFilePathGenerator(pathlib.PurePosixPath('zip_files'), 'zip'), validators=[django.core.validators.FileExtensionValidator(('zip',)), common.validators.MaxFileSizeValidator(524288000), common.validators.ZipArchiveValidator(50000, 2147483648, 100)], verbose_name='auto_delete_fileauto_delete_old_file'),
+        ),
+    ]
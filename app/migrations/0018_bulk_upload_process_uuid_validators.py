@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0017_zip_file_store_max_members'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bulkuploadprocess',
+            name='uuid',
+            field=models.UUIDField(primary_key=True, serialize=False),
+        ),
+    ]
@@ -1,26 +1,36 @@
+from collections import defaultdict
 from dataclasses import dataclass
+from datetime import datetime, timedelta
 from pathlib import PurePath
 from typing import cast
 import uuid
 import zipfile
-from django.db import models
+from django.db import models, transaction
 from django.core import validators
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.conf import settings
-from common.validators import MaxFileSizeValidator, ImageFormatAndFileExtensionsValidator
+from django.utils import timezone
+from common.validators import MaxFileSizeValidator, ImageFormatAndFileExtensionsValidator, ZipArchiveValidator
 from common.unique_file_path_generators import UniqueFilePathGenerator
-from common.image_utils import ImageFormat, get_file_extensions_for_image_format
+from common.image_utils import ImageFormat, get_file_extensions_for_image_format, get_image_probe
+from common.zip_utils import build_zip_manifest, get_zip_archive, load_zip_manifest
 from common.regexes import name_regex_validator, key_regex_validator
 from common.signals import SignalEffect
 from common.models import AbstractBaseModel
+from common.caches import VersionedProcessCache
+from common.counters import BufferedCounter
+from common.perceptual_hash import band_candidates, hamming_distance, split_bands, to_signed
 from app.fields import WallpaperDimensionField
+from app.validators import validate_group_process_exists as validate_group_process_exists # referenced by the initial migration
 from django.db.models.fields.files import ImageFieldFile, FieldFile
 from django.core.exceptions import ValidationError
+from PIL import UnidentifiedImageError
+from redis import RedisError
 from django_stubs_ext.db.models.manager import RelatedManager
 from project.settings import kb
-from celery.result import GroupResult
-from zipfile import Path as ZipPath
-from celery import group, chain
-from app.tasks import save_wallpaper, generate_and_save_dummy_wallpaper
+from celery import current_app, group
+from app.tasks import save_wallpapers_batch
 from project.settings import mb
 
 
@@ -30,27 +40,41 @@ wallpaper_image_upload_path_generator = UniqueFilePathGenerator(PurePath('wallpa
 
 wallpaper_dummy_upload_path_generator = UniqueFilePathGenerator(PurePath('wallpapers'), 'dummy')
 
+wallpaper_rendition_upload_path_generator = UniqueFilePathGenerator(PurePath('wallpapers'), 'rendition')
+
 zip_file_store_upload_path_generator = UniqueFilePathGenerator(PurePath('zip_files'), 'zip')
 
 
+wallpaper_dimension_registry: VersionedProcessCache[dict[tuple[int, int], uuid.UUID]] = VersionedProcessCache(
+    'wallpaper_dimension_registry',
+    lambda: {(width, height): pk for pk, width, height in WallpaperDimension.objects.values_list('pk', 'width', 'height')},
+    check_interval=settings.PROCESS_CACHE_CHECK_INTERVAL,
+)
+
+wallpaper_download_counter = BufferedCounter(
+    'wallpaper_download_counts',
+    settings.DOWNLOAD_COUNTS_REDIS_URL,
+    lock_timeout=settings.DOWNLOAD_COUNTS_FLUSH_LOCK_TIMEOUT,
+)
+
+settings_store_cache: VersionedProcessCache["SettingsStore"] = VersionedProcessCache(
+    'settings_store',
+    lambda: SettingsStore.settings.fetch_settings(),
+    check_interval=settings.PROCESS_CACHE_CHECK_INTERVAL,
+    ttl=settings.SETTINGS_STORE_CACHE_TTL,
+)
+
+
 def validate_image_max_file_size(value: ImageFieldFile) -> None:
     upper_limit = SettingsStore.settings.fetch_maximum_image_file_size_in_kb()
     MaxFileSizeValidator(upper_limit)(value)
 
 
-def validate_group_process_exists(value: uuid.UUID) -> None:
-    if GroupResult.restore(str(value)) is None: # type: ignore[attr-defined]
-        raise ValidationError(
-            "The group process %(process_uuid)s does not exists.",
-            code='group_process_does_not_exists',
-            params={'process_uuid': str(value)}
-        )
-
-
 @dataclass
 class Progress:
     finished_tasks: int
     total_tasks: int
+    failed_tasks: int = 0
 
     def calculate_percentage(self) -> int:
         try:
@@ -63,39 +87,260 @@ class _SettingsManager(models.Manager["SettingsStore"]):
 
     def fetch_settings(self) -> "SettingsStore":
         return self.get_or_create(key='BASE_SETTINGS')[0]
+
+
+    def fetch_cached_settings(self) -> "SettingsStore":
+        """Read-only settings shared by the whole process, do not modify or save the returned instance."""
+        return settings_store_cache.get()
     
 
     def fetch_maximum_image_file_size_in_kb(self) -> int:
-        return self.fetch_settings().maximum_image_file_size * 1024
+        return self.fetch_cached_settings().maximum_image_file_size * 1024
 
 
-class _BulkUploadManager(models.Manager["BulkUploadProcess"]):
+class _WallpaperDimensionManager(models.Manager["WallpaperDimension"]):
+
+    def fetch_dimension_id(self, width: int, height: int) -> uuid.UUID | None:
+        """Match the size against the process-local dimension registry instead of querying the table."""
+        return wallpaper_dimension_registry.get().get((width, height))
+
+
+class _WallpaperManager(models.Manager["Wallpaper"]):
+
+    def with_preview(self) -> models.QuerySet["Wallpaper"]:
+        """Wallpapers having renditions or a legacy dummy image to show."""
+        return self.filter(
+            models.Q(models.Exists(WallpaperRendition.objects.filter(wallpaper=models.OuterRef('pk')))) | ~models.Q(dummy_image='')
+        )
+
+
+    def fetch_id_for_content_hash(self, content_hash: str) -> uuid.UUID | None:
+        return self.filter(content_hash=content_hash).values_list('pk', flat=True).first()
+
+
+    def fetch_similar_ids(self, perceptual_hash: int, max_distance: int) -> list[tuple[uuid.UUID, int]]:
+        """Ids of the wallpapers whose perceptual hash is within `max_distance` bits of the hash, nearest first.
+
+        The candidates are looked up through the indexed bands of the hash and only they are compared bit by bit,
+        every hash is compared when the distance is too wide for the bands.
+        """
+        candidates = band_candidates(perceptual_hash, max_distance)
+        condition = ~models.Q(perceptual_hash=None)
+
+        if candidates is not None:
+            condition = models.Q()
+            for index, values in enumerate(candidates):
+                condition |= models.Q(**{f'perceptual_hash_band_{index}__in': values})
+
+        matches = [
+            (pk, hamming_distance(perceptual_hash, cast(int, candidate_hash)))
+            for pk, candidate_hash in self.filter(condition).values_list('pk', 'perceptual_hash')
+        ]
+        return sorted([match for match in matches if match[1] <= max_distance], key=lambda match: match[1])
+
+
+    def fetch_gallery_page(
+        self,
+        page_size: int,
+        after: tuple[datetime, uuid.UUID] | None = None,
+        dimension_id: uuid.UUID | None = None,
+        category_id: uuid.UUID | None = None,
+        tag_id: uuid.UUID | None = None,
+    ) -> tuple[list["Wallpaper"], bool]:
+        """The newest wallpapers having a preview that come after the `(created_at, uuid)` cursor, and whether more follow.
+
+        The page is read by seeking in an index over the ordering, so a deep page costs as much as the first one.
+        """
+        queryset = self.with_preview()
+
+        if dimension_id is not None:
+            queryset = queryset.filter(dimension_id=dimension_id)
+
+        # joined rather than matched against a subquery, so the database still walks the index over the ordering
+        if category_id is not None:
+            queryset = queryset.filter(wallpaper_group__category_id=category_id)
+
+        if tag_id is not None:
+            queryset = queryset.filter(wallpaper_group__tags=tag_id)
+
+        if after is not None:
+            created_at, pk = after
+            # the range on created_at alone lets the database seek in the index, the ties are excluded after
+            queryset = queryset.filter(created_at__lte=created_at).exclude(created_at=created_at, uuid__gte=pk)
+
+        wallpapers = list(queryset.order_by('-created_at', '-uuid').prefetch_related('renditions')[:page_size + 1])
+        return wallpapers[:page_size], len(wallpapers) > page_size
+
+
+    def fetch_popular(self, limit: int) -> list["Wallpaper"]:
+        """The most downloaded wallpapers, read from the head of the download count index rather than by sorting the table."""
+        return list(self.with_preview().order_by('-download_count', '-uuid').prefetch_related('renditions')[:limit])
+
+
+    def count_download(self, wallpaper_id: uuid.UUID) -> None:
+        """Buffer one download of the wallpaper, `flush_download_counts` applies it to the table later."""
+        try:
+            wallpaper_download_counter.increment(wallpaper_id.hex)
+        except RedisError:
+            pass # losing a hit is better than failing the download
+
+
+    def flush_download_counts(self) -> int:
+        """Apply the buffered downloads with one `F()` update per distinct count and batch of ids, return how many wallpapers were updated."""
+        with transaction.atomic(), wallpaper_download_counter.drain() as counts:
+            ids_by_count: defaultdict[int, list[uuid.UUID]] = defaultdict(list)
+            for wallpaper_id, count in counts.items():
+                ids_by_count[count].append(uuid.UUID(wallpaper_id))
+
+            for count, ids in ids_by_count.items():
+                for start in range(0, len(ids), settings.DOWNLOAD_COUNTS_FLUSH_BATCH_SIZE):
+                    self.filter(pk__in=ids[start:start + settings.DOWNLOAD_COUNTS_FLUSH_BATCH_SIZE]).update(
+                        download_count=models.F('download_count') + count
+                    )
 
-    def bulk_upload(self, zip_file_path: ZipPath) -> "BulkUploadProcess":
-        paths = []
-        extensions = get_file_extensions_for_image_format(ImageFormat.JPEG)
-        glob_patterns = [f'**/*{extension}' for extension in extensions]
-        glob_patterns += [f'*{extension}' for extension in extensions]
+        return len(counts)
 
-        for glob_pattern in glob_patterns: paths += [*zip_file_path.glob(glob_pattern)]
+
+class _BulkUploadManager(models.Manager["BulkUploadProcess"]):
+
+    def bulk_upload(self, zip_file_store: "ZipFileStore", batch_size: int | None = None) -> "BulkUploadProcess":
+        entries = load_zip_manifest(zip_file_store.manifest)
         
-        if not any(paths):
+        if not any(entries):
             raise ValueError('No files to process.')
 
-        group_result = cast(GroupResult, group(
-                chain(
+        if batch_size is None:
+            batch_size = settings.BULK_UPLOAD_BATCH_SIZE
+
+        if batch_size < 1:
+            raise ValueError(f'The batch_size ({batch_size}) must be a positive integer.')
+
+        zip_file_name = cast(FieldFile, zip_file_store.zip_file).name
+        starts = range(0, len(entries), batch_size)
+        process = BulkUploadProcess.objects.create(uuid=uuid.uuid4(), zip_file_store=zip_file_store, total_files=len(entries), total_batches=len(starts))
+
+        # the progress and the outcome are kept on the process, the group result is never read back
+        try:
+            group(
+
+                save_wallpapers_batch.s(process.uuid.hex, zip_file_name, entries[start:start + batch_size]).set(task_id=task_id)
+
+                for start, task_id in zip(starts, process.get_batch_task_ids())
+            ).apply_async(task_id=str(process.uuid))
+        except Exception as err:
+            # no batch may ever run to count the files
+            now = timezone.now()
+            with transaction.atomic():
+                self.filter(pk=process.pk, status=BulkUploadProcess.Status.RUNNING).update(
+                    status=BulkUploadProcess.Status.FAILED,
+                    failed_batches=models.F('total_batches'),
+                    finished_at=now,
+                    updated_at=now,
+                )
+                BulkUploadProcessError.objects.create(process=process, validation_error=f'Could not be dispatched, {type(err).__name__}.'[:64], at_file=cast(str, zip_file_name))
+            raise
+        return process
+
+
+    def cancel(self, process_id: uuid.UUID) -> bool:
+        """Mark the running process as cancelled and revoke its batches, False when it is not running.
+
+        The batch task ids are derived from the process, so every batch is revoked with a single broadcast
+        without asking the result backend. A batch already running stops before its next file.
+        """
+        now = timezone.now()
+        cancelled = self.filter(pk=process_id, status=BulkUploadProcess.Status.RUNNING).update(
+            status=BulkUploadProcess.Status.CANCELLED,
+            finished_at=now,
+            updated_at=now,
+        )
+        if not cancelled:
+            return False
+
+        process = self.only('uuid', 'total_batches').get(pk=process_id)
+        current_app.control.revoke(process.get_batch_task_ids())
+        return True
+
 
-                    save_wallpaper.s(file.at, str(file.root.filename)),
-                    
-                    generate_and_save_dummy_wallpaper.s(),
+    def fail_stale(self) -> int:
+        """Fail the running processes without progress for `BULK_UPLOAD_ENTRY_LIFETIME` seconds, return how many.
 
-                ) 
-                for file in paths
-            )(countdown=10)
+        Their remaining batches were lost, a late delivery could not tell its committed entries anymore.
+        """
+        now = timezone.now()
+        return self.filter(status=BulkUploadProcess.Status.RUNNING, updated_at__lt=now - timedelta(seconds=settings.BULK_UPLOAD_ENTRY_LIFETIME)).update(
+            status=BulkUploadProcess.Status.FAILED,
+            finished_at=now,
+            updated_at=now,
+        )
+
+
+    def fetch_is_cancelled(self, process_id: uuid.UUID) -> bool:
+        return self.filter(pk=process_id, status=BulkUploadProcess.Status.CANCELLED).exists()
+
+
+    def with_errors(self) -> models.QuerySet["BulkUploadProcess"]:
+        """The most recent processes first, each with its errors prefetched in the order they were found."""
+        return self.order_by('-started_at').prefetch_related(
+            models.Prefetch('errors', queryset=BulkUploadProcessError.objects.order_by('created_at'))
+        )
+
+
+    def count_finished_files(self, process_id: uuid.UUID, finished: int = 1, failed: int = 0, failed_batches: int = 0) -> None:
+        """Atomically count more processed files of the process, reading the progress never touches the result backend.
+
+        The count that processes the last file also records the outcome and `finished_at`, call it in the
+        transaction that writes the files so both are committed together.
+        """
+        now = timezone.now()
+        self.filter(pk=process_id).update(
+            finished_files=models.F('finished_files') + finished,
+            failed_files=models.F('failed_files') + failed,
+            failed_batches=models.F('failed_batches') + failed_batches,
+            updated_at=now,
+        )
+        self.filter(pk=process_id, status=BulkUploadProcess.Status.RUNNING, finished_files__gte=models.F('total_files')).update(
+            status=models.Case(
+                models.When(failed_batches__gt=0, then=models.Value(BulkUploadProcess.Status.FAILED)),
+                default=models.Value(BulkUploadProcess.Status.COMPLETED),
+            ),
+            finished_at=now,
         )
-        group_result.save() # type: ignore[attr-defined]
-        result_id = cast(str, group_result.id) # type: ignore[attr-defined]
-        return BulkUploadProcess.objects.create(uuid=uuid.UUID(result_id))
+
+
+class _BulkUploadProcessEntryManager(models.Manager["BulkUploadProcessEntry"]):
+
+    def fetch_seen_names(self, process_id: uuid.UUID, names: list[str]) -> set[str]:
+        """The names among `names` the process already committed an outcome for."""
+        return set(self.filter(process_id=process_id, name__in=names).values_list('name', flat=True))
+
+
+    def delete_expired(self) -> int:
+        """Delete the entries older than `BULK_UPLOAD_ENTRY_LIFETIME`, no delivery of their batches is expected anymore."""
+        deleted, _ = self.filter(created_at__lt=timezone.now() - timedelta(seconds=settings.BULK_UPLOAD_ENTRY_LIFETIME)).delete()
+        return deleted
+
+
+class _ZipFileUploadManager(models.Manager["ZipFileUpload"]):
+
+    def start(self, length: int) -> "ZipFileUpload":
+        """Create the empty file the chunks are written into, at the place the `ZipFileStore` keeps it."""
+        upload = self.model(length=length)
+        upload.file = default_storage.save(zip_file_store_upload_path_generator(upload, 'upload.zip'), ContentFile(b''))
+        upload.save()
+        return upload
+
+
+    def advance(self, upload_id: uuid.UUID, offset: int, new_offset: int) -> bool:
+        """Record the chunk written at the offset, False when another request recorded one there first."""
+        return self.filter(pk=upload_id, offset=offset).update(offset=new_offset, updated_at=timezone.now()) == 1
+
+
+    def delete_expired(self) -> int:
+        """Delete the uploads untouched for `ZIP_FILE_UPLOAD_LIFETIME` seconds along with their files."""
+        expired = self.filter(updated_at__lt=timezone.now() - timedelta(seconds=settings.ZIP_FILE_UPLOAD_LIFETIME))
+        deleted, _ = expired.delete()
+        return deleted
 
 
 class SettingsStore(AbstractBaseModel):
@@ -214,6 +459,7 @@ class WallpaperGroup(AbstractBaseModel):
 
 class Wallpaper(AbstractBaseModel):
 
+    created_at = models.DateTimeField(auto_now_add=True)
     download_count = models.PositiveIntegerField(
         default=0,
     )
@@ -237,6 +483,24 @@ class Wallpaper(AbstractBaseModel):
         ],
         max_length=256,
     )
+    content_hash = models.CharField(
+        blank=True,
+        null=True,
+        unique=True,
+        editable=False,
+        max_length=64,
+        help_text="SHA-256 hex digest of the image file.",
+    )
+    perceptual_hash = models.BigIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="64-bit difference hash of the image, stored signed.",
+    )
+    perceptual_hash_band_0 = models.PositiveIntegerField(blank=True, null=True, editable=False, db_index=True)
+    perceptual_hash_band_1 = models.PositiveIntegerField(blank=True, null=True, editable=False, db_index=True)
+    perceptual_hash_band_2 = models.PositiveIntegerField(blank=True, null=True, editable=False, db_index=True)
+    perceptual_hash_band_3 = models.PositiveIntegerField(blank=True, null=True, editable=False, db_index=True)
     dimension = models.ForeignKey(
         "WallpaperDimension",
         on_delete=models.CASCADE,
@@ -250,20 +514,73 @@ class Wallpaper(AbstractBaseModel):
         related_name='wallpapers',
     )
 
-    objects: models.Manager["Wallpaper"] = models.Manager()
+    renditions: RelatedManager["WallpaperRendition"]
 
+    objects: _WallpaperManager = _WallpaperManager()
 
-    def clean(self) -> None:
-        self.image = cast(ImageFieldFile, self.image)
 
+    class Meta(AbstractBaseModel.Meta):
+        indexes = [
+            models.Index(fields=['-created_at', '-uuid'], name='wallpaper_gallery_idx'),
+            models.Index(fields=['dimension', '-created_at', '-uuid'], name='wallpaper_dim_gallery_idx'),
+            models.Index(fields=['wallpaper_group', '-created_at', '-uuid'], name='wallpaper_group_gallery_idx'),
+            models.Index(fields=['-download_count', '-uuid'], name='wallpaper_popular_idx'),
+        ]
+
+
+    def clean(self) -> None:
         try:
-            self.dimension = WallpaperDimension.objects.get(width=self.image.width, height=self.image.height)
-        except WallpaperDimension.DoesNotExist:
+            probe = get_image_probe(cast(ImageFieldFile, self.image))
+        except UnidentifiedImageError:
+            return # already reported by the validators of the image field
+
+        dimension_id = WallpaperDimension.objects.fetch_dimension_id(probe.width, probe.height)
+
+        if dimension_id is None:
             raise ValidationError(
                 "Ensure the image dimensions match one of the allowed values, The current dimension: %(width)s x %(height)s is not supported.",
                 code="invalid_image_dimensions",
-                params={"width": str(self.image.width), "height": str(self.image.height)}
+                params={"width": str(probe.width), "height": str(probe.height)}
             )
+        
+        self.dimension_id = dimension_id
+
+
+    def set_perceptual_hash(self, perceptual_hash: int) -> None:
+        """Store the hash along with its bands, the bands index the similarity lookups."""
+        self.perceptual_hash = to_signed(perceptual_hash)
+        self.perceptual_hash_band_0, self.perceptual_hash_band_1, self.perceptual_hash_band_2, self.perceptual_hash_band_3 = split_bands(perceptual_hash)
+
+
+class WallpaperRendition(AbstractBaseModel):
+
+    wallpaper = models.ForeignKey(
+        Wallpaper,
+        on_delete=models.CASCADE,
+        related_name='renditions',
+    )
+    image = models.ImageField(
+        verbose_name=SignalEffect.AUTO_DELETE_FILE + SignalEffect.AUTO_DELETE_OLD_FILE,
+        unique=True,
+        upload_to=wallpaper_rendition_upload_path_generator,
+        validators=[
+            MaxFileSizeValidator(500 * kb),
+            ImageFormatAndFileExtensionsValidator((ImageFormat.WEBP, ))
+        ],
+        max_length=256,
+    )
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    file_size = models.PositiveIntegerField()
+
+
+    class Meta(AbstractBaseModel.Meta):
+        ordering = ['width']
+        constraints = [
+            models.UniqueConstraint(fields=['wallpaper', 'width'], name="unique_wallpaper_rendition_width")
+        ]
+
+    objects: models.Manager["WallpaperRendition"] = models.Manager()
 
 
 class WallpaperDimension(AbstractBaseModel):
@@ -279,7 +596,7 @@ class WallpaperDimension(AbstractBaseModel):
 
     wallpapers: RelatedManager["Wallpaper"]
 
-    objects: models.Manager["WallpaperDimension"] = models.Manager()
+    objects: _WallpaperDimensionManager = _WallpaperDimensionManager()
 
 
 class WallpaperTag(AbstractBaseModel):
@@ -299,14 +616,34 @@ class WallpaperTag(AbstractBaseModel):
 
 class BulkUploadProcess(AbstractBaseModel):
 
-    terminal_status = ('SUCCESS', 'FAILURE')
-    uuid = models.UUIDField(
-        primary_key=True,
-        validators=[
-            validate_group_process_exists,
-        ]
+    class Status(models.TextChoices):
+        RUNNING = 'running', 'Running'
+        COMPLETED = 'completed', 'Completed'
+        FAILED = 'failed', 'Failed'
+        CANCELLED = 'cancelled', 'Cancelled'
+
+    uuid = models.UUIDField(primary_key=True)
+    started_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    finished_at = models.DateTimeField(blank=True, null=True, editable=False)
+    total_files = models.PositiveIntegerField(default=0)
+    finished_files = models.PositiveIntegerField(default=0)
+    failed_files = models.PositiveIntegerField(default=0)
+    total_batches = models.PositiveIntegerField(default=0, editable=False)
+    failed_batches = models.PositiveIntegerField(default=0, editable=False)
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.RUNNING,
+        editable=False,
+    )
+    zip_file_store = models.ForeignKey(
+        "ZipFileStore",
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='processes',
     )
-    started_at = models.DateTimeField(auto_now=True)
     errors: RelatedManager["BulkUploadProcessError"]
 
     objects: models.Manager["BulkUploadProcess"] = models.Manager()
@@ -314,19 +651,16 @@ class BulkUploadProcess(AbstractBaseModel):
 
 
     def calculate_progress(self) -> Progress:
-        group_result = cast(GroupResult | None, GroupResult.restore(str(self.uuid))) # type: ignore[attr-defined]
+        return Progress(self.finished_files, self.total_files, self.failed_files)
 
-        if group_result is None:
-            raise ValueError(f'The group process for id {str(self.uuid)} cannot be found.')
 
-        total_results = len(group_result) * 2 # type: ignore[arg-type]
-        ready_results = 0
+    def is_finished(self) -> bool:
+        return self.status != BulkUploadProcess.Status.RUNNING
 
-        for result in group_result: # type: ignore[attr-defined]
-            if result.status in BulkUploadProcess.terminal_status: ready_results += 1
-            if result.parent.status in BulkUploadProcess.terminal_status: ready_results += 1
 
-        return Progress(ready_results, total_results)
+    def get_batch_task_ids(self) -> list[str]:
+        """The task ids of the batches, derived from the process so they can be revoked without the result backend."""
+        return [str(uuid.uuid5(self.uuid, str(index))) for index in range(self.total_batches)]
 
 
 class BulkUploadProcessError(AbstractBaseModel):
@@ -348,10 +682,38 @@ class BulkUploadProcessError(AbstractBaseModel):
             validators.MinLengthValidator(1),
         ]
     )
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     objects: models.Manager["BulkUploadProcessError"] = models.Manager()
 
 
+class BulkUploadProcessEntry(AbstractBaseModel):
+    """A zip entry whose outcome a process committed, a redelivered batch skips it."""
+
+    process = models.ForeignKey(
+        BulkUploadProcess,
+        on_delete=models.CASCADE,
+        related_name='entries',
+    )
+    name = models.CharField(max_length=1024)
+    wallpaper = models.ForeignKey(
+        Wallpaper,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+    )
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    objects: _BulkUploadProcessEntryManager = _BulkUploadProcessEntryManager()
+
+
+    class Meta(AbstractBaseModel.Meta):
+        constraints = [
+            models.UniqueConstraint(fields=['process', 'name'], name='unique_process_entry_name'),
+        ]
+
+
 class ZipFileStore(AbstractBaseModel):
 
     zip_file = models.FileField(
@@ -362,32 +724,53 @@ class ZipFileStore(AbstractBaseModel):
         validators=[
             validators.FileExtensionValidator(('zip', )),
             MaxFileSizeValidator(500 * mb),
+            ZipArchiveValidator(settings.ZIP_MAX_MEMBERS, settings.ZIP_MAX_UNCOMPRESSED_SIZE, settings.ZIP_MAX_COMPRESSION_RATIO),
         ],
         max_length=64
     )
+    manifest = models.JSONField(
+        default=list,
+        editable=False,
+    )
+    content_hash = models.CharField(
+        blank=True,
+        null=True,
+        editable=False,
+        max_length=64,
+        help_text="SHA-256 hex digest of the zip file, when it was uploaded in chunks.",
+    )
 
+    processes: RelatedManager["BulkUploadProcess"]
 
-    def clean(self) -> None:
-        zip_file = cast(FieldFile, self.zip_file)
+    objects: models.Manager["ZipFileStore"] = models.Manager()
 
+
+    def clean(self) -> None:
         try:
-            zipfile.ZipFile(zip_file)
-        except zipfile.BadZipfile as err:
-            raise ValidationError(
-                'Invalid zip file.',
-                code='invalid_zip_file'
-            )
-        
-        if (bad_file:=zipfile.ZipFile(zip_file).testzip()) is not None:
-            raise ValidationError(
-                "Bad file found in zip: %(bad_file)s",
-                code='bad_file_found_in_zip_file',
-                params=dict(bad_file=bad_file)
-            )
+            archive = get_zip_archive(cast(FieldFile, self.zip_file))
+        except (zipfile.BadZipFile, OSError, ValueError):
+            return # already reported by the validators of the zip file field
 
-        # needs more validation to prevent attacks like zip bomb
+        # the CRCs are checked member by member while the wallpapers are ingested
+        self.manifest = build_zip_manifest(archive, get_file_extensions_for_image_format(ImageFormat.JPEG))
 
 
-    def get_zip_file(self) -> zipfile.ZipFile:
-        zip_file = cast(FieldFile, self.zip_file)
-        return zipfile.ZipFile(zip_file)
+class ZipFileUpload(AbstractBaseModel):
+    """A zip file being uploaded in chunks, it becomes a `ZipFileStore` once complete."""
+
+    file = models.FileField(
+        verbose_name=SignalEffect.AUTO_DELETE_FILE,
+        upload_to=zip_file_store_upload_path_generator,
+        max_length=64,
+    )
+    length = models.PositiveBigIntegerField(
+        validators=[
+            validators.MinValueValidator(1),
+            validators.MaxValueValidator(settings.MAX_BULK_UPLOAD_SIZE),
+        ],
+    )
+    offset = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects: _ZipFileUploadManager = _ZipFileUploadManager()
@@ -1,55 +1,352 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
+import math
 import os
+import time
 import uuid
-from typing import cast
+import zipfile
+from typing import TYPE_CHECKING, Any, cast
+from billiard.einfo import ExceptionInfo
 from celery import shared_task, Task
 from django.core.files.images import ImageFile
-from common.image_utils import generate_webp_from_jpeg
+from common.image_utils import generate_webp_renditions_from_jpeg
+from common.perceptual_hash import dhash, hamming_distance
+from common.zip_utils import ZipFileCache, ZipManifestEntry, load_zip_manifest, spool_zip_manifest_entry
 from django.db.models.fields.files import ImageFieldFile
-from zipfile import Path as ZipPath
-from celery.exceptions import Reject
 from django.core.exceptions import ValidationError
-from celery.exceptions import Reject
 from django.conf import settings
+from django.db import DatabaseError, IntegrityError, OperationalError, transaction
 
+if TYPE_CHECKING:
+    from app.models import Wallpaper, WallpaperRendition
 
-@shared_task(bind=True, ignore_result=False, acks_late=False)
-def save_wallpaper(self: Task[[str, str], str], image_path: str, zip_file_path: str) -> str:
-    from app.models import BulkUploadProcess, Wallpaper, BulkUploadProcessError
 
-    with ZipPath(os.path.join(settings.MEDIA_ROOT, zip_file_path), at=image_path).open('rb') as f:
-        w = Wallpaper(image=ImageFile(f))
+zip_file_cache = ZipFileCache(settings.ZIP_FILE_CACHE_SIZE, settings.ZIP_FILE_CACHE_IDLE_TIMEOUT)
+
+
+def _prepare_wallpaper(zip_file: zipfile.ZipFile, entry: ZipManifestEntry, pending: "_WallpaperWriter") -> "Wallpaper":
+    """Validate the entry and store its image, the row itself is left to the caller."""
+    from app.models import Wallpaper
+
+    spooled_file, content_hash = spool_zip_manifest_entry(zip_file, entry, settings.ZIP_MEMBER_SPOOL_SIZE)
+
+    with spooled_file:
+        # exact duplicates are skipped before the image is opened by Pillow
+        _raise_if_duplicate(
+            pending.pending_content_hashes.get(content_hash) or Wallpaper.objects.fetch_id_for_content_hash(content_hash)
+        )
+
+        w = Wallpaper(image=ImageFile(spooled_file, name=entry.name), content_hash=content_hash)
+        w.full_clean(exclude=('dimension', 'content_hash'))
+
+        spooled_file.seek(0)
+        w.set_perceptual_hash(dhash(spooled_file))
+
+        image = cast(ImageFieldFile, w.image)
+        image.save(entry.name, image.file, save=False)
+    return w
+
+
+def _raise_if_duplicate(wallpaper_id: uuid.UUID | None) -> None:
+    if wallpaper_id is not None:
+        raise ValidationError(
+            "Duplicate of %(wallpaper)s.",
+            code='duplicate_wallpaper',
+            params={'wallpaper': str(wallpaper_id)}
+        )
+
+
+def _render_wallpaper_renditions(w: "Wallpaper") -> list["WallpaperRendition"]:
+    """Store the renditions of the wallpaper, the rows are left to the caller."""
+    from app.models import WallpaperRendition, wallpaper_rendition_upload_path_generator
+
+    renditions: list[WallpaperRendition] = []
+    try:
+        for webp_rendition in generate_webp_renditions_from_jpeg(w.image.file, settings.WALLPAPER_RENDITION_WIDTHS):
+            rendition = WallpaperRendition(wallpaper=w, width=webp_rendition.width, height=webp_rendition.height, file_size=webp_rendition.file_size)
+            rendition_image_field = cast(ImageFieldFile, rendition.image)
+            rendition_image_field.save(wallpaper_rendition_upload_path_generator(rendition, 'rendition.webp'), webp_rendition.image_file, save=False)
+            renditions.append(rendition)
+    except Exception:
+        for rendition in renditions:
+            cast(ImageFieldFile, rendition.image).delete(save=False)
+        raise
+    return renditions
+
+
+def _find_near_duplicate(w: "Wallpaper", pending: Iterable["Wallpaper"] = ()) -> uuid.UUID | None:
+    from app.models import Wallpaper
+
+    if w.perceptual_hash is None:
+        return None
+
+    for wallpaper_id, _ in Wallpaper.objects.fetch_similar_ids(w.perceptual_hash, settings.NEAR_DUPLICATE_MAX_DISTANCE):
+        if wallpaper_id != w.pk:
+            return wallpaper_id
+
+    for other in pending:
+        if other.perceptual_hash is not None and hamming_distance(w.perceptual_hash, other.perceptual_hash) <= settings.NEAR_DUPLICATE_MAX_DISTANCE:
+            return other.pk
+    return None
+
+
+def _truncate_error_message(message: str) -> str:
+    from app.models import BulkUploadProcessError
+
+    max_length = cast(int, BulkUploadProcessError._meta.get_field('validation_error').max_length)
+    return message if len(message) <= max_length else message[:max_length - 1] + '…'
+
+
+@dataclass
+class _IngestedWallpaper:
+    entry_name: str
+    wallpaper: "Wallpaper"
+    renditions: list["WallpaperRendition"]
+
+
+class _WallpaperWriter:
+    """Buffer the rows of the processed files of a batch and commit them together with `bulk_create`.
+
+    The rows are written once `max_files` files are pending or `max_delay` seconds have passed since the
+    last write, each write takes the database write lock once instead of a few times per file. The
+    entries are marked as seen by the process in the same transaction.
+    """
+
+    def __init__(self, process_id: uuid.UUID, max_files: int, max_delay: float) -> None:
+        self.process_id = process_id
+        self.max_files = max_files
+        self.max_delay = max_delay
+        self.wallpapers: list[_IngestedWallpaper] = []
+        self.failed_entries: list[str] = []
+        self.errors: list[tuple[str, str]] = []
+        self.pending_content_hashes: dict[str, uuid.UUID] = {}
+        self.written_at = time.monotonic()
+
+
+    def add_wallpaper(self, entry_name: str, w: "Wallpaper", renditions: list["WallpaperRendition"], warning: str | None = None) -> None:
+        self.wallpapers.append(_IngestedWallpaper(entry_name, w, renditions))
+        self.pending_content_hashes[cast(str, w.content_hash)] = w.pk
+        if warning is not None:
+            self.errors.append((entry_name, _truncate_error_message(warning)))
+        self._flush_if_due()
+
+
+    def add_error(self, entry_name: str, message: str) -> None:
+        self.failed_entries.append(entry_name)
+        self.errors.append((entry_name, _truncate_error_message(message)))
+        self._flush_if_due()
+
+
+    def _flush_if_due(self) -> None:
+        if len(self.wallpapers) + len(self.failed_entries) >= self.max_files or time.monotonic() - self.written_at >= self.max_delay:
+            self.flush()
+
+
+    def flush(self) -> None:
+        if self.wallpapers or self.failed_entries:
+            _write_ingested_rows(self.process_id, self.wallpapers, self.failed_entries, self.errors)
+
+        self.wallpapers, self.failed_entries, self.errors = [], [], []
+        self.pending_content_hashes.clear()
+        self.written_at = time.monotonic()
+
+
+    def discard(self) -> None:
+        """Delete the stored files of the wallpapers not written yet, when the batch gives up or is retried."""
+        for ingested in self.wallpapers:
+            _delete_ingested_files(ingested)
+
+        self.wallpapers, self.failed_entries, self.errors = [], [], []
+        self.pending_content_hashes.clear()
+
+
+def _delete_ingested_files(ingested: _IngestedWallpaper) -> None:
+    for file in [ingested.wallpaper.image, *(rendition.image for rendition in ingested.renditions)]:
+        cast(ImageFieldFile, file).delete(save=False)
+
+
+def _write_ingested_rows(process_id: uuid.UUID, wallpapers: list[_IngestedWallpaper], failed_entries: list[str], errors: list[tuple[str, str]]) -> None:
+    from app.models import BulkUploadProcess, BulkUploadProcessEntry, BulkUploadProcessError, Wallpaper, WallpaperRendition
 
     try:
-        w.full_clean(exclude=('dimension', ))
-    except ValidationError as err:
-        group_id = cast(str, self.request.chain[0]['options']['group_id']) # type: ignore
-        
-        if group_id is not None:
-            try:
-                process = BulkUploadProcess.objects.get(pk=uuid.UUID(group_id))
-                BulkUploadProcessError.objects.create(
-                    process=process,
-                    validation_error=' '.join(err.messages),
-                    at_file=image_path
-                )
-            except BulkUploadProcess.DoesNotExist:
-                ...
-                
-        raise err
-
-    w.save()
-    return w.uuid.hex
-
-
-@shared_task(bind=True, ignore_result=False, acks_late=False)
-def generate_and_save_dummy_wallpaper(self: Task[[str], None], wallpaper_id: str) -> None:
-    from app.models import Wallpaper, wallpaper_dummy_upload_path_generator
-
-    w = Wallpaper.objects.get(pk=uuid.UUID(wallpaper_id))
-
-    if w.dummy_image != '':
-        raise Reject("Dummy already exists", requeue=False)
-    
-    dummy_image_file = generate_webp_from_jpeg(w.image.file)
-    dummy_image_field = cast(ImageFieldFile, w.dummy_image)
-    dummy_image_field.save(wallpaper_dummy_upload_path_generator(w, 'dummy.webp'), dummy_image_file, save=True)
+        with transaction.atomic():
+            Wallpaper.objects.bulk_create([ingested.wallpaper for ingested in wallpapers])
+            WallpaperRendition.objects.bulk_create([rendition for ingested in wallpapers for rendition in ingested.renditions])
+            BulkUploadProcessError.objects.bulk_create([
+                BulkUploadProcessError(process_id=process_id, validation_error=message, at_file=entry_name) for entry_name, message in errors
+            ])
+            BulkUploadProcessEntry.objects.bulk_create(
+                [BulkUploadProcessEntry(process_id=process_id, name=ingested.entry_name, wallpaper=ingested.wallpaper) for ingested in wallpapers] +
+                [BulkUploadProcessEntry(process_id=process_id, name=entry_name) for entry_name in failed_entries]
+            )
+            BulkUploadProcess.upload_procedures.count_finished_files(process_id, len(wallpapers) + len(failed_entries), len(failed_entries))
+        return
+    except IntegrityError:
+        pass
+
+    # another delivery of the batch, a concurrent save of the same image or a deleted process got in the way, one file at a time then
+    if not BulkUploadProcess.objects.filter(pk=process_id).exists():
+        for ingested in wallpapers:
+            _delete_ingested_files(ingested)
+        wallpapers.clear()
+        return
+
+    seen = BulkUploadProcessEntry.objects.fetch_seen_names(process_id, [ingested.entry_name for ingested in wallpapers] + failed_entries)
+    failed_entries = [entry_name for entry_name in failed_entries if entry_name not in seen]
+    errors = [(entry_name, message) for entry_name, message in errors if entry_name not in seen]
+    saved = 0
+
+    # each wallpaper leaves the list once settled, what remains if this raises was never written
+    for ingested in list(wallpapers):
+        if ingested.entry_name in seen:
+            _delete_ingested_files(ingested)
+            wallpapers.remove(ingested)
+            continue
+
+        try:
+            with transaction.atomic():
+                ingested.wallpaper.save()
+                WallpaperRendition.objects.bulk_create(ingested.renditions)
+                BulkUploadProcessEntry.objects.create(process_id=process_id, name=ingested.entry_name, wallpaper=ingested.wallpaper)
+            saved += 1
+        except IntegrityError:
+            _delete_ingested_files(ingested)
+            duplicate_id = Wallpaper.objects.fetch_id_for_content_hash(cast(str, ingested.wallpaper.content_hash))
+            # its near duplicate warning, if any, is replaced by the error
+            errors = [(entry_name, message) for entry_name, message in errors if entry_name != ingested.entry_name]
+            errors.append((ingested.entry_name, f'Duplicate of {duplicate_id}.' if duplicate_id is not None else 'Could not be saved.'))
+            failed_entries.append(ingested.entry_name)
+        wallpapers.remove(ingested)
+
+    with transaction.atomic():
+        BulkUploadProcessError.objects.bulk_create([
+            BulkUploadProcessError(process_id=process_id, validation_error=message, at_file=entry_name) for entry_name, message in errors
+        ])
+        BulkUploadProcessEntry.objects.bulk_create([BulkUploadProcessEntry(process_id=process_id, name=entry_name) for entry_name in failed_entries])
+        BulkUploadProcess.upload_procedures.count_finished_files(process_id, saved + len(failed_entries), len(failed_entries))
+
+
+def _write_failed_batch(process_id: uuid.UUID, entries: list[ZipManifestEntry], exc: Exception) -> None:
+    from app.models import BulkUploadProcess, BulkUploadProcessEntry, BulkUploadProcessError
+
+    if not BulkUploadProcess.objects.filter(pk=process_id).exists():
+        return
+
+    seen = BulkUploadProcessEntry.objects.fetch_seen_names(process_id, [entry.name for entry in entries])
+    remaining = [entry.name for entry in entries if entry.name not in seen]
+    message = _truncate_error_message(f'Not processed, the batch failed with {type(exc).__name__}.')
+
+    with transaction.atomic():
+        BulkUploadProcessError.objects.bulk_create([
+            BulkUploadProcessError(process_id=process_id, validation_error=message, at_file=entry_name) for entry_name in remaining
+        ])
+        BulkUploadProcessEntry.objects.bulk_create([BulkUploadProcessEntry(process_id=process_id, name=entry_name) for entry_name in remaining], ignore_conflicts=True)
+        BulkUploadProcess.upload_procedures.count_finished_files(process_id, len(remaining), len(remaining), failed_batches=1)
+
+
+class _BulkUploadBatchTask(Task[Any, Any]):
+    """Counts the files a batch could not process once it gives up, so its process still reaches a terminal state."""
+
+    def on_failure(self, exc: Exception, task_id: str, args: tuple[Any, ...], kwargs: dict[str, Any], einfo: ExceptionInfo) -> None:
+        process_id, _, manifest = args
+        _write_failed_batch(uuid.UUID(process_id), load_zip_manifest(manifest), exc)
+
+
+@shared_task(
+    bind=True,
+    base=_BulkUploadBatchTask,
+    ignore_result=True,
+    acks_late=True,
+    reject_on_worker_lost=True,
+    autoretry_for=(OperationalError, ),
+    max_retries=settings.BULK_UPLOAD_MAX_RETRIES,
+    retry_backoff=True,
+)
+def save_wallpapers_batch(self: Task[[str, str, list[list[str | int]]], dict[str, int]], process_id: str, zip_file_path: str, manifest: list[list[str | int]]) -> dict[str, int]:
+    """Validate and render the renditions of every entry of one chunk of the zip manifest.
+
+    The rows are committed in bulk by a `_WallpaperWriter` as the files are processed. Validation
+    errors are recorded per file and do not fail the batch, the files are counted on the process
+    with each write. The entries the process has seen, committed by an earlier delivery or try of
+    the batch, are skipped so the batch can be acknowledged late and retried. The batch looks for
+    the cancellation of its process every `BULK_UPLOAD_CANCEL_CHECK_INTERVAL` seconds and stops
+    before the next file, the files already processed are still written. A batch that gives up
+    counts its remaining files as failed. The result is not stored, the process row holds the outcome.
+    """
+    from app.models import BulkUploadProcess, BulkUploadProcessEntry
+
+    process_uuid = uuid.UUID(process_id)
+    entries = load_zip_manifest(manifest)
+    seen = BulkUploadProcessEntry.objects.fetch_seen_names(process_uuid, [entry.name for entry in entries])
+    writer = _WallpaperWriter(process_uuid, settings.BULK_UPLOAD_WRITE_BATCH_SIZE, settings.BULK_UPLOAD_WRITE_INTERVAL)
+    finished = failed = 0
+    cancel_checked_at = -math.inf
+
+    with zip_file_cache.open(os.path.join(settings.MEDIA_ROOT, zip_file_path)) as zip_file:
+        try:
+            for entry in entries:
+                if entry.name in seen:
+                    continue
+
+                if time.monotonic() >= cancel_checked_at + settings.BULK_UPLOAD_CANCEL_CHECK_INTERVAL:
+                    if BulkUploadProcess.upload_procedures.fetch_is_cancelled(process_uuid):
+                        break
+                    cancel_checked_at = time.monotonic()
+
+                error_message = None
+                w = None
+                try:
+                    w = _prepare_wallpaper(zip_file, entry, writer)
+                    renditions = _render_wallpaper_renditions(w)
+                except ValidationError as err:
+                    error_message = ' '.join(err.messages)
+                except DatabaseError:
+                    raise # retried with the whole batch
+                except Exception as err: # a bad file, like a decompression bomb, fails alone
+                    error_message = str(err) or type(err).__name__
+
+                if error_message is not None:
+                    if w is not None: # stored but never referenced
+                        cast(ImageFieldFile, w.image).delete(save=False)
+                    writer.add_error(entry.name, error_message)
+                    failed += 1
+                elif w is not None:
+                    # a warning, the wallpaper is kept
+                    near_duplicate_id = _find_near_duplicate(w, (ingested.wallpaper for ingested in writer.wallpapers))
+                    writer.add_wallpaper(entry.name, w, renditions, None if near_duplicate_id is None else f'Near duplicate of {near_duplicate_id}.')
+                finished += 1
+
+            writer.flush()
+        except BaseException:
+            writer.discard()
+            raise
+
+    return {'finished': finished, 'failed': failed}
+
+
+@shared_task(bind=True, ignore_result=True, acks_late=False)
+def delete_expired_bulk_upload_entries(self: Task[[], int]) -> int:
+    from app.models import BulkUploadProcessEntry
+
+    return BulkUploadProcessEntry.objects.delete_expired()
+
+
+@shared_task(bind=True, ignore_result=True, acks_late=False)
+def fail_stale_bulk_upload_processes(self: Task[[], int]) -> int:
+    from app.models import BulkUploadProcess
+
+    return BulkUploadProcess.upload_procedures.fail_stale()
+
+
+@shared_task(bind=True, ignore_result=True, acks_late=False)
+def flush_download_counts(self: Task[[], int]) -> int:
+    from app.models import Wallpaper
+
+    return Wallpaper.objects.flush_download_counts()
+
+
+@shared_task(bind=True, ignore_result=True, acks_late=False)
+def delete_expired_zip_file_uploads(self: Task[[], int]) -> int:
+    from app.models import ZipFileUpload
+
+    return ZipFileUpload.objects.delete_expired()
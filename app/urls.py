@@ -6,7 +6,14 @@ urlpatterns = [
 
     path('', views.index),
     path('bulk-upload', views.bulk_upload, name='bulk_upload'),
+    path('bulk-upload/uploads', views.start_zip_file_upload, name='start_zip_file_upload'),
+    path('bulk-upload/uploads/<uuid:upload_id>', views.zip_file_upload, name='zip_file_upload'),
+    path('bulk-upload/<uuid:process_id>/cancel', views.cancel_bulk_upload, name='cancel_bulk_upload'),
     path('progress', views.progress, name='progress'),
+    path('progress/stream', views.progress_stream, name='progress_stream'),
     path('wallpapers', views.wallpapers, name='wallpapers'),
+    path('wallpapers/popular', views.popular_wallpapers, name='popular_wallpapers'),
+    path('wallpapers/<uuid:wallpaper_id>/download', views.download_wallpaper, name='download_wallpaper'),
+    path('wallpapers/<uuid:wallpaper_id>/similar', views.similar_wallpapers, name='similar_wallpapers'),
 
 ]
@@ -0,0 +1,8 @@
+import uuid
+
+
+def validate_group_process_exists(value: uuid.UUID) -> None:
+    """No longer validates anything, the migrations that created `BulkUploadProcess.uuid` still reference it.
+
+    The progress and the outcome of a process live on its row, the result backend is not asked.
+    """
@@ -1,12 +1,27 @@
+import asyncio
+from collections.abc import AsyncIterator, Iterable
+from datetime import datetime, timedelta, timezone
 import json
-from typing import cast
+from pathlib import PurePosixPath
+import time
+from typing import Any, cast
+from urllib.parse import urlencode
 import uuid
 from django.conf import settings
-from django.http import HttpRequest, HttpResponse, Http404
+from django.core.paginator import Paginator
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.fields.files import FieldFile, ImageFieldFile
+from django.http import HttpRequest, HttpResponse, Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.http.response import HttpResponseBase
 from django.shortcuts import render, redirect, resolve_url, get_object_or_404
-from app.forms import ZipFileStoreModelForm, ProgressForm
-from app.models import BulkUploadProcess, Wallpaper
-import zipfile
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_http_methods, require_POST
+from kombu.exceptions import OperationalError as BrokerError
+from app.forms import ZipFileStoreModelForm, ProgressForm, WallpaperGalleryForm
+from app.models import BulkUploadProcess, BulkUploadProcessError, Wallpaper, ZipFileStore, ZipFileUpload
+from common.chunked_uploads import UploadBusy, UploadHashes, open_locked, write_chunk
+from common.file_responses import serve_file
 
 
 def index(request: HttpRequest) -> HttpResponse:
@@ -21,44 +36,284 @@ def bulk_upload(request: HttpRequest) -> HttpResponse:
         if form.is_valid():
             form.save()
             try:
-                BulkUploadProcess.upload_procedures.bulk_upload(zipfile.Path(form.instance.get_zip_file()))
-            except ValueError:
-                ...
+                BulkUploadProcess.upload_procedures.bulk_upload(form.instance)
+            except (ValueError, BrokerError):
+                ... # a process that could not be dispatched is shown as failed
             response = HttpResponse()
             response['HX-Refresh'] = 'true'
             return response
         else:
             return render(request, 'app/partials/form_errors.html', dict(form=form))
 
-    return render(request, 'app/bulk_upload.html', dict(form=ZipFileStoreModelForm(), processes=BulkUploadProcess.objects.all()))
+    processes = Paginator(BulkUploadProcess.upload_procedures.with_errors(), settings.BULK_UPLOAD_PROCESSES_PER_PAGE).get_page(request.GET.get('page'))
+    stream_query = urlencode([('process_uuid', process.uuid.hex) for process in processes if not process.is_finished()])
+    return render(request, 'app/bulk_upload.html', dict(form=ZipFileStoreModelForm(), processes=processes, stream_query=stream_query, chunk_size=settings.ZIP_FILE_UPLOAD_MAX_CHUNK_SIZE))
+
+
+@require_POST
+def cancel_bulk_upload(request: HttpRequest, process_id: uuid.UUID) -> HttpResponse:
+    if not BulkUploadProcess.upload_procedures.cancel(process_id):
+        get_object_or_404(BulkUploadProcess, pk=process_id) # already finished otherwise
+
+    response = HttpResponse()
+    response['HX-Refresh'] = 'true'
+    return response
+
+
+zip_file_upload_hashes = UploadHashes(settings.ZIP_FILE_UPLOAD_HASH_CACHE_SIZE)
+
+
+def _upload_offset_response(upload: ZipFileUpload, status: int = 204) -> HttpResponse:
+    response = HttpResponse(status=status)
+    response['Upload-Offset'] = str(upload.offset)
+    response['Upload-Length'] = str(upload.length)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@require_POST
+def start_zip_file_upload(request: HttpRequest) -> HttpResponse:
+    """Start a resumable upload of a zip file of `Upload-Length` bytes, its chunks are sent to the `Location`."""
+    try:
+        length = int(request.headers['Upload-Length'])
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest("The Upload-Length header must be the size of the file in bytes.")
+
+    if not 0 < length <= settings.MAX_BULK_UPLOAD_SIZE:
+        return HttpResponse(f"The file must not exceed {settings.MAX_BULK_UPLOAD_SIZE} bytes.", status=413)
+
+    upload = ZipFileUpload.objects.start(length)
+    response = _upload_offset_response(upload, status=201)
+    response['Location'] = resolve_url('zip_file_upload', upload_id=upload.uuid)
+    return response
+
+
+@require_http_methods(['HEAD', 'PATCH'])
+def zip_file_upload(request: HttpRequest, upload_id: uuid.UUID) -> HttpResponse:
+    """`HEAD` tells the offset to resume from, `PATCH` writes the chunk in the body at `Upload-Offset` into the file in place.
+
+    The chunk that completes the file turns it into a `ZipFileStore` and starts the bulk upload.
+    """
+    upload = get_object_or_404(ZipFileUpload, pk=upload_id)
+
+    if request.method == 'HEAD':
+        return _upload_offset_response(upload, status=200)
+
+    if request.content_type != 'application/offset+octet-stream':
+        return HttpResponse("The chunk must be sent as application/offset+octet-stream.", status=415)
+
+    try:
+        offset, chunk_length = int(request.headers['Upload-Offset']), int(request.headers['Content-Length'])
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest("The Upload-Offset and Content-Length headers are required.")
+
+    if offset != upload.offset:
+        return _upload_offset_response(upload, status=409)
+
+    if chunk_length > settings.ZIP_FILE_UPLOAD_MAX_CHUNK_SIZE or offset + chunk_length > upload.length:
+        return HttpResponse(f"The chunk must not exceed {settings.ZIP_FILE_UPLOAD_MAX_CHUNK_SIZE} bytes nor the end of the file.", status=413)
+
+    path = cast(FieldFile, upload.file).path
+    try:
+        with open_locked(path) as file:
+            # a concurrent chunk may have been recorded before the lock was taken
+            upload.refresh_from_db(fields=['offset'])
+            if offset != upload.offset:
+                return _upload_offset_response(upload, status=409)
+
+            state = zip_file_upload_hashes.resume(upload.pk, path, offset)
+            written = write_chunk(file, offset, request, chunk_length, state)
+
+            if not ZipFileUpload.objects.advance(upload.pk, offset, offset + written):
+                upload.refresh_from_db()
+                return _upload_offset_response(upload, status=409)
+    except UploadBusy:
+        return _upload_offset_response(upload, status=409)
+
+    upload.offset = offset + written
+    if upload.offset < upload.length:
+        zip_file_upload_hashes.store(upload.pk, upload.offset, state)
+        return _upload_offset_response(upload)
+
+    zip_file_upload_hashes.discard(upload.pk)
+    return _complete_zip_file_upload(upload, state.hexdigest())
+
+
+def _complete_zip_file_upload(upload: ZipFileUpload, content_hash: str) -> HttpResponse:
+    # the store takes the file over where it was written, nothing is copied
+    zip_file_store = ZipFileStore(zip_file=cast(FieldFile, upload.file).name, content_hash=content_hash)
+
+    try:
+        zip_file_store.full_clean()
+
+        with transaction.atomic():
+            zip_file_store.save()
+            upload.file = ''
+            upload.delete()
+    except ValidationError as err:
+        upload.delete()
+        return JsonResponse({'errors': err.messages}, status=422)
+    finally:
+        # opened by the validators
+        cast(FieldFile, zip_file_store.zip_file).close()
+
+    try:
+        BulkUploadProcess.upload_procedures.bulk_upload(zip_file_store)
+    except (ValueError, BrokerError):
+        ...
+
+    response = _upload_offset_response(upload)
+    response['HX-Refresh'] = 'true'
+    return response
+
+
+def _serialize_progress(process: BulkUploadProcess, errors: Iterable[BulkUploadProcessError]) -> dict[str, Any]:
+    progress = process.calculate_progress()
+    return {
+        'width': progress.calculate_percentage(),
+        'finished': progress.finished_tasks,
+        'failed': progress.failed_tasks,
+        'total': progress.total_tasks,
+        'status': process.status,
+        'errors': [{'id': error.uuid.hex, 'at_file': error.at_file, 'message': error.validation_error} for error in errors],
+    }
 
 
 def progress(request: HttpRequest) -> HttpResponse:
     form = ProgressForm(request.GET)
-    if form.is_valid():
-        process_uuid = form.cleaned_data['process_uuid']
+    if not form.is_valid():
+        return JsonResponse(form.errors, status=400)
+
+    processes = BulkUploadProcess.upload_procedures.with_errors().filter(pk__in=form.cleaned_data['process_uuid'])
+    return JsonResponse({process.uuid.hex: _serialize_progress(process, process.errors.all()) for process in processes})
 
-        try:
-            process = get_object_or_404(BulkUploadProcess, pk=uuid.UUID(process_uuid))
+
+def _to_event_id(moment: datetime) -> int:
+    return int(moment.timestamp() * 1_000_000)
+
+
+def _from_event_id(event_id: int) -> datetime:
+    return datetime.fromtimestamp(event_id / 1_000_000, tz=timezone.utc)
+
+
+def _format_event(event: str, data: Any, event_id: int | None = None) -> str:
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+async def _progress_events(process_uuids: list[uuid.UUID], last_event_id: int) -> AsyncIterator[str]:
+    """Yield a `progress` event whenever a counter of the processes changes and `done` once all of them are finished.
+
+    The event id is the latest `updated_at` seen, so a reconnecting client only receives what changed since.
+    Rows updated shortly before the event id are read again to catch late commits, and are de-duplicated here.
+    """
+    overlap = timedelta(seconds=settings.BULK_UPLOAD_STREAM_OVERLAP)
+    sent_counters: dict[uuid.UUID, tuple[int, int, int, str]] = {}
+    sent_errors: set[uuid.UUID] = set()
+    pending: set[uuid.UUID] | None = None
+    last_write = time.monotonic()
+
+    yield f'retry: {settings.BULK_UPLOAD_STREAM_RETRY * 1000}\n\n'
+
+    while pending is None or any(pending):
+        since = _from_event_id(last_event_id) - overlap
+        queryset = BulkUploadProcess.objects.filter(pk__in=process_uuids if pending is None else pending)
+        processes = [process async for process in (queryset if pending is None else queryset.filter(updated_at__gt=since))]
+        changed = [process for process in processes if process.updated_at > since]
+
+        if pending is None:
+            pending = {process.uuid for process in processes if process in changed or not process.is_finished()}
+
+        errors: dict[uuid.UUID, list[BulkUploadProcessError]] = {process.uuid: [] for process in changed}
+        async for error in BulkUploadProcessError.objects.filter(process__in=changed, created_at__gt=since).order_by('created_at'):
+            if error.uuid not in sent_errors:
+                sent_errors.add(error.uuid)
+                errors[error.process_id].append(error)
+
+        data = {}
+        for process in changed:
             progress = process.calculate_progress()
-            width = progress.calculate_percentage()
-        except ValueError:
-            return HttpResponse(286)
-        
-        errors = [f"<b>{error.at_file}</b>: {error.validation_error}" for error in  process.errors.all()]
-
-        if progress.finished_tasks == progress.total_tasks:
-            response = HttpResponse(status=286)
-        else:        
-            response = HttpResponse()
-            
-        response['HX-Trigger-After-Swap'] = json.dumps({f'update_{process_uuid}': {'width': width, 'errors': errors}})
+            counters = progress.finished_tasks, progress.failed_tasks, progress.total_tasks, process.status
+            if sent_counters.get(process.uuid) != counters or any(errors[process.uuid]):
+                sent_counters[process.uuid] = counters
+                data[process.uuid.hex] = _serialize_progress(process, errors[process.uuid])
+            if process.is_finished():
+                pending.discard(process.uuid)
+            last_event_id = max(last_event_id, _to_event_id(process.updated_at))
+
+        if any(data):
+            yield _format_event('progress', data, last_event_id)
+            last_write = time.monotonic()
+        elif time.monotonic() - last_write >= settings.BULK_UPLOAD_STREAM_KEEP_ALIVE:
+            yield ': keep-alive\n\n'
+            last_write = time.monotonic()
+
+        if any(pending):
+            await asyncio.sleep(settings.BULK_UPLOAD_STREAM_INTERVAL)
+
+    yield _format_event('done', {}, last_event_id)
+
+
+async def progress_stream(request: HttpRequest) -> HttpResponseBase:
+    form = ProgressForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest()
+
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', 0))
+    except ValueError:
+        last_event_id = 0
+
+    response = StreamingHttpResponse(_progress_events(form.cleaned_data['process_uuid'], last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
-        return response
-    
-    return HttpResponse(286)
-    
 
 def wallpapers(request: HttpRequest) -> HttpResponse:
-    images = Wallpaper.objects.exclude(dummy_image__isnull=True).values('dummy_image')[:10]
-    return render(request, 'app/wallpapers.html', dict(images=images, media_url=settings.MEDIA_URL))
+    form = WallpaperGalleryForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest()
+
+    filters = form.cleaned_data
+    page, has_next = Wallpaper.objects.fetch_gallery_page(
+        settings.WALLPAPER_GALLERY_PAGE_SIZE,
+        after=filters['cursor'],
+        dimension_id=filters['dimension'] and filters['dimension'].pk,
+        category_id=filters['category'] and filters['category'].pk,
+        tag_id=filters['tag'] and filters['tag'].pk,
+    )
+    next_cursor = WallpaperGalleryForm.encode_cursor(page[-1]) if has_next else None
+    return render(request, 'app/wallpapers.html', dict(form=form, wallpapers=page, next_cursor=next_cursor))
+
+
+def popular_wallpapers(request: HttpRequest) -> HttpResponse:
+    return render(request, 'app/wallpapers.html', dict(wallpapers=Wallpaper.objects.fetch_popular(settings.POPULAR_WALLPAPERS_LIMIT)))
+
+
+def download_wallpaper(request: HttpRequest, wallpaper_id: uuid.UUID) -> HttpResponseBase:
+    wallpaper = get_object_or_404(Wallpaper.objects.only('uuid', 'image', 'content_hash', 'created_at'), pk=wallpaper_id)
+    image = cast(ImageFieldFile, wallpaper.image)
+    etag = quote_etag(wallpaper.content_hash) if wallpaper.content_hash else None
+
+    response, from_start = serve_file(request, image, PurePosixPath(cast(str, image.name)).name, etag, wallpaper.created_at)
+
+    # revalidations and resumed downloads are not new downloads
+    if request.method == 'GET' and from_start:
+        Wallpaper.objects.count_download(wallpaper.pk)
+
+    return response
+
+
+def similar_wallpapers(request: HttpRequest, wallpaper_id: uuid.UUID) -> HttpResponse:
+    wallpaper = get_object_or_404(Wallpaper, pk=wallpaper_id)
+    similar_ids = [] if wallpaper.perceptual_hash is None else [
+        pk for pk, _ in Wallpaper.objects.fetch_similar_ids(wallpaper.perceptual_hash, settings.SIMILAR_WALLPAPERS_MAX_DISTANCE)
+        if pk != wallpaper.pk
+    ][:settings.SIMILAR_WALLPAPERS_LIMIT]
+
+    similar = Wallpaper.objects.prefetch_related('renditions').in_bulk(similar_ids)
+    return render(request, 'app/wallpapers.html', dict(wallpapers=[similar[pk] for pk in similar_ids if pk in similar]))
@@ -0,0 +1,64 @@
+from collections.abc import Callable
+import threading
+import time
+from typing import Any, Generic, TypeVar
+import uuid
+from django.core.cache import cache
+from django.db import transaction
+
+
+T = TypeVar('T')
+
+
+class VersionedProcessCache(Generic[T]):
+    """Process-local copy of a value loaded from the database, reloaded once its shared version changes.
+
+    The version token lives in the Django cache, so invalidating it from one process makes every web
+    and Celery process reload its copy. The token is read at most once every `check_interval` seconds
+    and the copy is dropped after `ttl` seconds whatever the token says, if a ttl is given.
+    """
+
+    def __init__(self, key: str, loader: Callable[[], T], check_interval: float, ttl: float | None = None) -> None:
+        self.key = key
+        self.loader = loader
+        self.check_interval = check_interval
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._version: str | None = None
+        self._value: T | None = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+
+
+    def get(self) -> T:
+        now = time.monotonic()
+
+        with self._lock:
+            if self._loaded and now - self._checked_at < self.check_interval and (self.ttl is None or now - self._loaded_at < self.ttl):
+                return self._value # type: ignore[return-value]
+
+            version = cache.get(self.key)
+            if version is None:
+                cache.add(self.key, uuid.uuid4().hex, timeout=None)
+                version = cache.get(self.key)
+            self._checked_at = now
+
+            if not self._loaded or version != self._version or (self.ttl is not None and now - self._loaded_at >= self.ttl):
+                self._value = self.loader()
+                self._version = version
+                self._loaded = True
+                self._loaded_at = now
+
+            return self._value # type: ignore[return-value]
+
+
+    def invalidate(self) -> None:
+        cache.set(self.key, uuid.uuid4().hex, timeout=None)
+        with self._lock:
+            self._loaded = False
+
+
+    def invalidate_on_commit(self, sender: type[Any], **kwargs: Any) -> None:
+        """Signal receiver invalidating the cache once the transaction that changed the rows is committed."""
+        transaction.on_commit(self.invalidate)
@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+import fcntl
+import hashlib
+import threading
+from typing import BinaryIO, Protocol
+
+
+_CHUNK_READ_SIZE = 1024 * 1024
+
+
+class Hash(Protocol):
+
+    def update(self, data: bytes, /) -> None: ...
+
+    def copy(self) -> "Hash": ...
+
+    def hexdigest(self) -> str: ...
+
+
+class Readable(Protocol):
+
+    def read(self, size: int, /) -> bytes: ...
+
+
+class UploadHashes:
+    """SHA-256 states of the uploads in progress in this process, by upload and offset.
+
+    A chunk arriving at another process than the previous one resumes by hashing the bytes already
+    written, only the first chunk after a switch reads the file back.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._states: OrderedDict[object, tuple[int, Hash]] = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def resume(self, key: object, path: str, offset: int) -> Hash:
+        """A copy of the state of the upload at the offset, it is stored back with `store` once the chunk is recorded."""
+        with self._lock:
+            stored = self._states.get(key)
+        if stored is not None and stored[0] == offset:
+            return stored[1].copy()
+
+        state: Hash = hashlib.sha256()
+        with open(path, 'rb') as f:
+            remaining = offset
+            while remaining and (data := f.read(min(_CHUNK_READ_SIZE, remaining))):
+                state.update(data)
+                remaining -= len(data)
+        return state
+
+
+    def store(self, key: object, offset: int, state: Hash) -> None:
+        with self._lock:
+            self._states[key] = offset, state
+            self._states.move_to_end(key)
+            while len(self._states) > self.max_size:
+                self._states.popitem(last=False)
+
+
+    def discard(self, key: object) -> None:
+        with self._lock:
+            self._states.pop(key, None)
+
+
+class UploadBusy(Exception):
+    pass
+
+
+@contextmanager
+def open_locked(path: str) -> Iterator[BinaryIO]:
+    """Open the file of an upload for writing, locked across the processes of the host until it is closed.
+
+    Raises `UploadBusy` when another request is writing a chunk of the same upload.
+    """
+    with open(path, 'r+b') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadBusy(path)
+        yield f
+
+
+def write_chunk(file: BinaryIO, offset: int, stream: Readable, length: int, state: Hash) -> int:
+    """Copy up to `length` bytes of the stream into the file at the offset and hash them, return how many were written.
+
+    A stream ending early, like a dropped connection, writes what was received.
+    """
+    written = 0
+    file.seek(offset)
+    while written < length:
+        try:
+            data = stream.read(min(_CHUNK_READ_SIZE, length - written))
+        except OSError: # the client went away, what arrived is kept
+            break
+        if not data:
+            break
+        file.write(data)
+        state.update(data)
+        written += len(data)
+    return written
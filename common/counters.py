@@ -0,0 +1,66 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+import threading
+from typing import cast
+import redis
+
+
+class BufferedCounter:
+    """Counters per member accumulated in a Redis hash with `HINCRBY`, to be applied to the database in batches.
+
+    Counting a hit is a single atomic Redis command, it never waits on a database write lock. The hash is
+    moved aside while it is drained, so the hits counted meanwhile go to a fresh hash.
+    """
+
+    def __init__(self, key: str, redis_url: str, lock_timeout: float) -> None:
+        self.key = key
+        self.redis_url = redis_url
+        self.lock_timeout = lock_timeout
+        self._draining_key = f'{key}:draining'
+        self._lock_key = f'{key}:lock'
+        self._client: redis.Redis | None = None
+        self._client_lock = threading.Lock()
+
+
+    def get_client(self) -> redis.Redis:
+        with self._client_lock:
+            if self._client is None:
+                self._client = redis.Redis.from_url(self.redis_url)
+            return self._client
+
+
+    def increment(self, member: str, amount: int = 1) -> None:
+        self.get_client().hincrby(self.key, member, amount)
+
+
+    @contextmanager
+    def drain(self) -> Iterator[dict[str, int]]:
+        """Yield the buffered counts, they are dropped from Redis only once the block exits without error.
+
+        Counts left over by a drain that failed are yielded again first. Concurrent drains yield nothing. Enter
+        the block inside the transaction applying the counts, so they are dropped before it commits: a commit
+        that fails then loses them rather than a retry applying them twice.
+        """
+        client = self.get_client()
+        lock = client.lock(self._lock_key, timeout=self.lock_timeout, blocking=False)
+
+        if not lock.acquire():
+            yield {}
+            return
+
+        try:
+            if not client.exists(self._draining_key):
+                try:
+                    client.rename(self.key, self._draining_key)
+                except redis.ResponseError: # nothing was counted
+                    yield {}
+                    return
+
+            counts = cast(dict[bytes, bytes], client.hgetall(self._draining_key))
+            yield {member.decode(): int(count) for member, count in counts.items()}
+
+            if not lock.owned(): # another drain may have taken over the expired lock and applied them too
+                raise redis.exceptions.LockNotOwnedError(f'The lock of {self.key} expired while it was drained.') # type: ignore[no-untyped-call]
+            client.delete(self._draining_key)
+        finally:
+            lock.release()
@@ -0,0 +1,142 @@
+from datetime import datetime
+import mimetypes
+from typing import IO, NamedTuple, cast
+from urllib.parse import quote
+from django.conf import settings
+from django.db.models.fields.files import FieldFile
+from django.http import FileResponse, HttpRequest, HttpResponse
+from django.http.response import HttpResponseBase
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date
+
+
+class ByteRange(NamedTuple):
+    start: int
+    end: int # inclusive
+
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start + 1
+
+
+class UnsatisfiableRange(ValueError):
+    pass
+
+
+def parse_byte_range(header: str, size: int) -> ByteRange | None:
+    """The single byte range of a `Range` header, None when the header is anything else and the whole file is to be sent.
+
+    Raises `UnsatisfiableRange` when the range starts past the end of the file.
+    """
+    unit, _, ranges = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in ranges:
+        return None
+
+    first, _, last = ranges.strip().partition('-')
+    try:
+        if first == '':
+            suffix = int(last)
+            if suffix <= 0:
+                raise UnsatisfiableRange(header)
+            return ByteRange(max(0, size - suffix), size - 1)
+
+        start, end = int(first), int(last) if last else size - 1
+    except UnsatisfiableRange:
+        raise
+    except ValueError:
+        return None
+
+    if start >= size:
+        raise UnsatisfiableRange(header)
+    if start < 0 or end < start:
+        return None
+    return ByteRange(start, min(end, size - 1))
+
+
+class _FileRange:
+    """Read-only view of `length` bytes of a file from its current position."""
+
+    def __init__(self, file: IO[bytes], length: int) -> None:
+        self.file = file
+        self.remaining = length
+
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b''
+        data = self.file.read(self.remaining if size < 0 else min(size, self.remaining))
+        self.remaining -= len(data)
+        return data
+
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def _if_range_matches(request: HttpRequest, etag: str | None, last_modified: datetime) -> bool:
+    if_range = request.headers.get('If-Range')
+    return if_range is None or if_range in (etag, http_date(last_modified.timestamp()))
+
+
+class ServedFile(NamedTuple):
+    response: HttpResponseBase
+    from_start: bool # the body is the file or a range of it starting at its first byte
+
+
+def serve_file(request: HttpRequest, file: FieldFile, filename: str, etag: str | None, last_modified: datetime) -> ServedFile:
+    """Respond with the stored file as an attachment, honouring conditional and single `Range` requests.
+
+    A `304` or `412` is answered from the metadata alone. The bytes are handed to the front server through
+    `X-Accel-Redirect` or `X-Sendfile` when `SENDFILE_BACKEND` is set, the server then serves the range itself.
+    Otherwise a `FileResponse` streams them, whole files through the `wsgi.file_wrapper` of the server.
+    """
+    response: HttpResponseBase | None = get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()))
+    from_start = False
+
+    if response is None:
+        response, from_start = _file_response(request, file, filename, etag, last_modified)
+
+    if etag is not None:
+        response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    response['Accept-Ranges'] = 'bytes'
+    patch_cache_control(response, private=True, no_cache=True)
+    return ServedFile(response, from_start)
+
+
+def _file_response(request: HttpRequest, file: FieldFile, filename: str, etag: str | None, last_modified: datetime) -> ServedFile:
+    size = file.size
+    byte_range = None
+    range_header = request.headers.get('Range')
+
+    if range_header is not None and _if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = parse_byte_range(range_header, size)
+        except UnsatisfiableRange:
+            response: HttpResponseBase = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return ServedFile(response, False)
+
+    from_start = byte_range is None or byte_range.start == 0
+
+    if settings.SENDFILE_BACKEND is not None:
+        # the front server fills the body and its length in
+        response = HttpResponse(content_type=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response['Content-Disposition'] = cast(str, content_disposition_header(True, filename))
+        if settings.SENDFILE_BACKEND == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = quote(f'{settings.SENDFILE_URL_PREFIX}{file.name}')
+        else:
+            response['X-Sendfile'] = file.path
+        return ServedFile(response, from_start)
+
+    stored_file = file.storage.open(cast(str, file.name), 'rb')
+
+    if byte_range is None or byte_range.length == size:
+        return ServedFile(FileResponse(stored_file, as_attachment=True, filename=filename), from_start)
+
+    stored_file.seek(byte_range.start)
+    response = FileResponse(_FileRange(stored_file, byte_range.length), status=206, as_attachment=True, filename=filename)
+    response['Content-Length'] = str(byte_range.length)
+    response['Content-Range'] = f'bytes {byte_range.start}-{byte_range.end}/{size}'
+    return ServedFile(response, from_start)
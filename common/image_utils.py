@@ -1,8 +1,11 @@
-from collections.abc import Mapping
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
 from enum import StrEnum
 import io
+from typing import IO, cast
 from django.core.files.images import ImageFile
-from PIL import Image
+from django.db.models.fields.files import FieldFile, ImageFieldFile
+from PIL import ExifTags, Image, ImageOps
 
 
 class ImageFormat(StrEnum):
@@ -73,18 +76,105 @@ def get_image_format_for_file_extension(file_extension: str) -> ImageFormat:
         raise ValueError(f"File extension {file_extension} is not recognized.")
 
 
-def generate_webp_from_jpeg(image_file: ImageFile) -> ImageFile:
-    in_memory_file = io.BytesIO()
+@dataclass(frozen=True)
+class ImageProbe:
+    format: str
+    width: int
+    height: int
+    mode: str
+    orientation: int
+    file_size: int
+
+
+def probe_image(image_file: IO[bytes], file_size: int) -> ImageProbe:
+    """Read the format, size, mode and EXIF orientation of the image from its header, the pixels are not decoded."""
+    with Image.open(image_file) as img:
+        return ImageProbe(
+            format=str(img.format),
+            width=img.width,
+            height=img.height,
+            mode=img.mode,
+            orientation=int(img.getexif().get(ExifTags.Base.Orientation, 1)),
+            file_size=file_size,
+        )
+
+
+def get_image_probe(value: FieldFile) -> ImageProbe:
+    """Probe the file of the field once and attach the result to it, so every validator and `clean` reads the same probe.
+
+    The probe is tied to the underlying file object and is computed again if another file is assigned.
+    """
+    file = value.file
+    attached = getattr(value, '_image_probe', None)
+
+    if attached is not None and attached[0] is file:
+        return attached[1] # type: ignore[no-any-return]
+
+    probe = probe_image(file, value.size)
+    value._image_probe = file, probe # type: ignore[attr-defined]
+
+    if isinstance(value, ImageFieldFile):
+        value._dimensions_cache = probe.width, probe.height # type: ignore[attr-defined]
+
+    return probe
+
+
+def get_attached_image_probe(value: FieldFile) -> ImageProbe | None:
+    """The probe attached to the file of the field by `get_image_probe`, without probing it."""
+    attached = getattr(value, '_image_probe', None)
+
+    if attached is None or not value or attached[0] is not value.file:
+        return None
+
+    return attached[1] # type: ignore[no-any-return]
+
+
+@dataclass(frozen=True)
+class WebpRendition:
+    width: int
+    height: int
+    file_size: int
+    image_file: ImageFile
+
+
+_TRANSPOSED_ORIENTATIONS = frozenset((5, 6, 7, 8))
+
+
+def generate_webp_renditions_from_jpeg(image_file: IO[bytes], widths: Iterable[int]) -> list[WebpRendition]:
+    """Encode a WebP rendition of the JPEG for every width smaller than the image, or a single one at its own width.
+
+    The JPEG is DCT-scaled while decoding to the smallest size covering the widest rendition, and every
+    narrower rendition is resized from the previous one, so the full resolution is never held in memory.
+    """
+    renditions: list[WebpRendition] = []
+
     with Image.open(image_file) as img:
         if img.format != ImageFormat.JPEG:
             raise ValueError("The image must be in JPEG format.")
-        img.save(
-            in_memory_file,
-            format=ImageFormat.WEBP,
-
-            # webp compression params
-            quality=20,
-            alpha_quality=0,
-            method=6,
-        )
-    return ImageFile(in_memory_file)
+
+        transposed = int(img.getexif().get(ExifTags.Base.Orientation, 1)) in _TRANSPOSED_ORIENTATIONS
+        width, height = (img.height, img.width) if transposed else img.size
+        targets = sorted({w for w in widths if w < width} or {width}, reverse=True)
+
+        draft_size = targets[0], max(1, height * targets[0] // width)
+        img.draft('RGB', draft_size[::-1] if transposed else draft_size)
+        source = cast(Image.Image, ImageOps.exif_transpose(img)).convert('RGB')
+
+        for target in targets:
+            size = target, max(1, height * target // width)
+            if source.size != size:
+                source = source.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+            in_memory_file = io.BytesIO()
+            source.save(
+                in_memory_file,
+                format=ImageFormat.WEBP,
+
+                # webp compression params
+                quality=20,
+                alpha_quality=0,
+                method=4,
+            )
+            renditions.append(WebpRendition(*size, in_memory_file.tell(), ImageFile(in_memory_file)))
+
+    return renditions
@@ -0,0 +1,190 @@
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from enum import StrEnum, auto
+import functools
+import io
+import math
+import random
+import threading
+import time
+from types import ModuleType
+from typing import Any
+import zipfile
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from PIL import Image
+
+
+class SyntheticFileKind(StrEnum):
+    VALID = auto()
+    WRONG_DIMENSION = auto()
+    WRONG_FORMAT = auto()
+    CORRUPT = auto()
+
+
+def _render_jpeg(size: tuple[int, int], rng: random.Random, image_format: str = 'JPEG') -> bytes:
+    """Smooth colour noise upscaled to the size, it compresses like a photo rather than like a flat fill or pure noise."""
+    width, height = size
+    seed = Image.frombytes('RGB', (width // 32 + 2, height // 32 + 2), rng.randbytes((width // 32 + 2) * (height // 32 + 2) * 3))
+    in_memory_file = io.BytesIO()
+    seed.resize(size, Image.Resampling.BICUBIC).save(in_memory_file, format=image_format, quality=85)
+    return in_memory_file.getvalue()
+
+
+def build_synthetic_zip(path: str, count: int, resolutions: list[tuple[int, int]], invalid_ratio: float, seed: int) -> Counter[SyntheticFileKind]:
+    """Write a zip of `count` JPEG files cycling through the resolutions, `invalid_ratio` of them being rejected by validation or decoding."""
+    rng = random.Random(seed)
+    invalid_kinds = [SyntheticFileKind.WRONG_DIMENSION, SyntheticFileKind.WRONG_FORMAT, SyntheticFileKind.CORRUPT]
+    invalid_indexes = set(rng.sample(range(count), round(count * invalid_ratio)))
+    kinds: Counter[SyntheticFileKind] = Counter()
+
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for index in range(count):
+            size = resolutions[index % len(resolutions)]
+            kind = SyntheticFileKind.VALID
+            if index in invalid_indexes:
+                kind = invalid_kinds[sum(kinds[invalid_kind] for invalid_kind in invalid_kinds) % len(invalid_kinds)]
+
+            if kind == SyntheticFileKind.WRONG_DIMENSION:
+                data = _render_jpeg((size[0] - 1, size[1]), rng)
+            elif kind == SyntheticFileKind.WRONG_FORMAT:
+                data = _render_jpeg(size, rng, image_format='PNG')
+            elif kind == SyntheticFileKind.CORRUPT:
+                data = _render_jpeg(size, rng)
+                data = data[:len(data) // 2]
+            else:
+                data = _render_jpeg(size, rng)
+
+            archive.writestr(f'{kind}/{index:06d}.jpg', data)
+            kinds[kind] += 1
+
+    return kinds
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of the values, 0.0 when there is none."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+class LatencyRecorder:
+    """Thread-safe collection of durations per stage."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._durations: defaultdict[str, list[float]] = defaultdict(list)
+
+
+    def record(self, stage: str, duration: float) -> None:
+        with self._lock:
+            self._durations[stage].append(duration)
+
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {
+                stage: {
+                    'count': len(durations),
+                    'total_ms': sum(durations) * 1000,
+                    'mean_ms': sum(durations) * 1000 / len(durations),
+                    'p50_ms': percentile(durations, 50) * 1000,
+                    'p99_ms': percentile(durations, 99) * 1000,
+                    'max_ms': max(durations) * 1000,
+                }
+                for stage, durations in self._durations.items()
+            }
+
+
+@contextmanager
+def instrument_functions(module: ModuleType, stages: dict[str, str], recorder: LatencyRecorder) -> Iterator[None]:
+    """Time every call of the module level functions, named by attribute, under their stage while the context is active."""
+    originals = {attribute: getattr(module, attribute) for attribute in stages}
+
+    def timed(stage: str, function: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with recorder.measure(stage):
+                return function(*args, **kwargs)
+        return wrapper
+
+    for attribute, stage in stages.items():
+        setattr(module, attribute, timed(stage, originals[attribute]))
+    try:
+        yield
+    finally:
+        for attribute, function in originals.items():
+            setattr(module, attribute, function)
+
+
+class QueryCounter:
+    """Database execute wrapper counting the statements by their leading keyword, on every connection of every thread."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counts: Counter[str] = Counter()
+
+
+    def __call__(self, execute: Callable[..., Any], sql: str, params: Any, many: bool, context: dict[str, Any]) -> Any:
+        keyword = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else 'EMPTY'
+        with self._lock:
+            self.counts[keyword] += 1
+        return execute(sql, params, many, context)
+
+
+    def _install(self, sender: type[BaseDatabaseWrapper], connection: BaseDatabaseWrapper, **kwargs: Any) -> None:
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+    @contextmanager
+    def installed(self) -> Iterator[None]:
+        installed_on = list(connections.all(initialized_only=True))
+        for connection in installed_on:
+            self._install(type(connection), connection)
+        connection_created.connect(self._install, weak=False, dispatch_uid=f'BENCHMARK_QUERY_COUNTER_{id(self)}')
+        try:
+            yield
+        finally:
+            connection_created.disconnect(dispatch_uid=f'BENCHMARK_QUERY_COUNTER_{id(self)}')
+            for connection in installed_on:
+                if self in connection.execute_wrappers:
+                    connection.execute_wrappers.remove(self)
+
+
+@contextmanager
+def count_method_calls(cls: type, names: Iterable[str], counts: Counter[str]) -> Iterator[None]:
+    """Count the calls of the methods of the class, on every instance, while the context is active."""
+    lock = threading.Lock()
+    originals = {name: cls.__dict__[name] for name in names if callable(cls.__dict__.get(name))}
+    inherited = {name: getattr(cls, name) for name in names if name not in originals and callable(getattr(cls, name, None))}
+
+    def counted(name: str, function: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with lock:
+                counts[name] += 1
+            return function(*args, **kwargs)
+        return wrapper
+
+    for name, function in {**originals, **inherited}.items():
+        setattr(cls, name, counted(name, function))
+    try:
+        yield
+    finally:
+        for name, function in originals.items():
+            setattr(cls, name, function)
+        for name in inherited:
+            delattr(cls, name)
@@ -0,0 +1,99 @@
+from collections.abc import Iterable, Iterator
+import heapq
+import itertools
+import os
+import tempfile
+from typing import IO
+from django.apps import apps
+from django.db import connection, models
+from django.db.models.functions import Collate
+from common.unique_file_path_generators import UniqueFilePathGenerator
+
+
+# collations ordering text by code point, like Python does
+_BINARY_COLLATIONS = {
+    'postgresql': 'C',
+    'sqlite': 'BINARY',
+    'mysql': 'utf8mb4_bin',
+}
+
+
+def file_fields() -> list[tuple[type[models.Model], models.FileField]]:
+    return [
+        (model, field)
+        for model in apps.get_models()
+        for field in model._meta.get_fields()
+        if isinstance(field, models.FileField)
+    ]
+
+
+def upload_directories(fields: Iterable[tuple[type[models.Model], models.FileField]]) -> list[str]:
+    """The directories the fields upload to, relative to the storage root."""
+    return sorted({str(field.upload_to.base_path) for _, field in fields if isinstance(field.upload_to, UniqueFilePathGenerator)})
+
+
+def scan_files(root: str, directories: Iterable[str], modified_before: float) -> Iterator[str]:
+    """The paths, relative to the root and `/` separated, of the regular files under the directories last modified before the timestamp."""
+    pending = [os.path.join(root, directory) for directory in directories]
+    while pending:
+        try:
+            scanner = os.scandir(pending.pop())
+        except FileNotFoundError:
+            continue
+        with scanner:
+            for entry in scanner:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime < modified_before:
+                    yield os.path.relpath(entry.path, root).replace(os.sep, '/')
+
+
+def _read_run(run: IO[str]) -> Iterator[str]:
+    with run:
+        for line in run:
+            yield line[:-1]
+
+
+def external_sorted(names: Iterable[str], chunk_size: int) -> Iterator[str]:
+    """The names in code point order, sorted in chunks spilled to temporary files and merged, to bound the memory."""
+    names = iter(names)
+    runs: list[IO[str]] = []
+    try:
+        for chunk in iter(lambda: sorted(itertools.islice(names, chunk_size)), []):
+            if not runs and len(chunk) < chunk_size:
+                yield from chunk
+                return
+            run: IO[str] = tempfile.TemporaryFile('w+', encoding='utf-8', errors='surrogateescape')
+            run.writelines(f'{name}\n' for name in chunk if '\n' not in name)
+            run.seek(0)
+            runs.append(run)
+
+        yield from heapq.merge(*(_read_run(run) for run in runs))
+    finally:
+        for run in runs:
+            run.close()
+
+
+def referenced_names(fields: Iterable[tuple[type[models.Model], models.FileField]], chunk_size: int) -> Iterator[str]:
+    """The file names stored in every file field, in code point order, streamed from the database."""
+    collation = _BINARY_COLLATIONS[connection.vendor]
+    yield from heapq.merge(*(
+        model._default_manager
+            .exclude(**{field.attname: ''})
+            .filter(**{f'{field.attname}__isnull': False})
+            .order_by(Collate(field.attname, collation))
+            .values_list(field.attname, flat=True)
+            .iterator(chunk_size)
+        for model, field in fields
+    ))
+
+
+def sorted_difference(names: Iterable[str], excluded: Iterable[str]) -> Iterator[str]:
+    """The names missing from `excluded`, both sorted, in a single pass over each."""
+    excluded_names = iter(excluded)
+    current = next(excluded_names, None)
+    for name in names:
+        while current is not None and current < name:
+            current = next(excluded_names, None)
+        if current != name:
+            yield name
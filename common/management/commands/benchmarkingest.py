@@ -0,0 +1,256 @@
+from argparse import ArgumentParser, ArgumentTypeError
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from importlib.metadata import version
+import json
+import math
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from typing import Any
+from celery.contrib.testing.worker import start_worker # type: ignore[import-untyped]
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import override_settings
+from common.management.commands._ingest_benchmark import (
+    LatencyRecorder,
+    QueryCounter,
+    SyntheticFileKind,
+    build_synthetic_zip,
+    count_method_calls,
+    instrument_functions,
+)
+
+
+RESULT_BACKEND_METHODS = (
+    'get', 'mget', 'set', 'delete', 'incr', 'expire',
+    'store_result', 'get_task_meta', 'save_group', 'restore_group', 'delete_group', 'forget',
+)
+
+TASK_STAGES = {
+    '_prepare_wallpaper': 'prepare_wallpaper',
+    '_render_wallpaper_renditions': 'renditions',
+    '_write_ingested_rows': 'write_rows',
+}
+
+
+def _parse_resolutions(value: str) -> list[tuple[int, int]]:
+    try:
+        resolutions = [(int(width), int(height)) for width, height in (item.lower().split('x') for item in value.split(','))]
+    except ValueError:
+        raise ArgumentTypeError(f"Invalid resolutions {value!r}, expected a comma separated list like 1920x1080,3840x2160.")
+    if not resolutions or any(not 64 <= side <= 8192 for resolution in resolutions for side in resolution):
+        raise ArgumentTypeError("Every side of the resolutions must be between 64 and 8192 pixels.")
+    return resolutions
+
+
+def _peak_rss_kb() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+class Command(BaseCommand):
+    help = "Benchmark the bulk upload pipeline end to end on a synthetic zip of JPEG files, against a throwaway database and media root. Celery runs either eagerly or in an in-process worker, over in-memory stand-ins of Redis unless --redis-url is given."
+
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument('--count', type=int, default=100, help="Number of files in the synthetic zip.")
+        parser.add_argument('--resolutions', type=_parse_resolutions, default='1898x1266,2048x1365,3840x5760', help="Comma separated WIDTHxHEIGHT the valid files cycle through.")
+        parser.add_argument('--invalid-ratio', type=float, default=0.1, help="Fraction of files with a wrong dimension, a wrong format or a truncated body.")
+        parser.add_argument('--batch-size', type=int, default=None, help="Files per Celery task, BULK_UPLOAD_BATCH_SIZE by default.")
+        parser.add_argument('--mode', choices=('eager', 'worker'), default='eager', help="Run the tasks eagerly in this thread or in an in-process worker.")
+        parser.add_argument('--workers', type=int, default=1, help="Concurrency of the in-process worker.")
+        parser.add_argument('--redis-url', default=None, help="Redis used as broker, result backend and cache instead of the in-memory stand-ins.")
+        parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic zip generator.")
+        parser.add_argument('--timeout', type=float, default=600, help="Seconds to wait for the worker to finish every batch.")
+        parser.add_argument('--output', default=None, help="Write the JSON report to this path, '-' for stdout.")
+
+
+    def handle(self, *args: str, **options: Any) -> None:
+        if options['count'] < 1 or not 0 <= options['invalid_ratio'] <= 1 or options['workers'] < 1:
+            raise CommandError("The count and workers must be positive and the invalid ratio between 0 and 1.")
+
+        with tempfile.TemporaryDirectory(prefix='benchmarkingest-') as media_root:
+            zip_path = os.path.join(media_root, 'synthetic.zip')
+
+            self.stdout.write(self.style.NOTICE(f"🧪 Generating {options['count']} synthetic files..."))
+            kinds = build_synthetic_zip(zip_path, options['count'], options['resolutions'], options['invalid_ratio'], options['seed'])
+
+            with self._stand_ins(media_root, options['redis_url']), self._throwaway_database(media_root):
+                self.stdout.write(self.style.NOTICE(f"🚀 Ingesting in {options['mode']} mode..."))
+                report = self._run(zip_path, kinds, options)
+
+        self._write_report(report, options['output'])
+
+
+    @contextmanager
+    def _stand_ins(self, media_root: str, redis_url: str | None) -> Iterator[None]:
+        from project import celery_app
+
+        caches = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': redis_url}} if redis_url else \
+            {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        # the configuration is namespaced like the Django settings it was loaded from
+        previous = {f'CELERY_{key.upper()}': celery_app.conf[key] for key in ('broker_url', 'result_backend', 'task_always_eager')}
+        celery_app.conf.update(CELERY_BROKER_URL=redis_url or 'memory://', CELERY_RESULT_BACKEND=redis_url or 'cache+memory://')
+
+        try:
+            with override_settings(MEDIA_ROOT=media_root, CACHES=caches):
+                yield
+        finally:
+            celery_app.conf.update(previous)
+
+
+    @contextmanager
+    def _throwaway_database(self, directory: str) -> Iterator[None]:
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection.vendor == 'sqlite':
+            # a file rather than the shared in-memory database, the worker threads write concurrently
+            connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+    def _run(self, zip_path: str, kinds: Counter[SyntheticFileKind], options: dict[str, Any]) -> dict[str, Any]:
+        from project import celery_app
+        from app import tasks
+        from app.models import BulkUploadProcess, WallpaperDimension, ZipFileStore
+
+        WallpaperDimension.objects.bulk_create(
+            [WallpaperDimension(width=width, height=height) for width, height in set(options['resolutions'])]
+        )
+
+        recorder = LatencyRecorder()
+        queries = QueryCounter()
+        backend_ops: Counter[str] = Counter()
+        task_started: dict[str, float] = {}
+        finished_batches = 0
+        expected_batches = math.inf
+        all_finished = threading.Event()
+        lock = threading.Lock()
+
+        def on_task_prerun(task_id: str, **kwargs: Any) -> None:
+            task_started[task_id] = time.perf_counter()
+
+        def on_task_postrun(task_id: str, **kwargs: Any) -> None:
+            nonlocal finished_batches
+            recorder.record('batch', time.perf_counter() - task_started.pop(task_id))
+            with lock:
+                finished_batches += 1
+                if finished_batches >= expected_batches:
+                    all_finished.set()
+
+        celery_app.conf.update(CELERY_TASK_ALWAYS_EAGER=options['mode'] == 'eager')
+        worker = start_worker(celery_app, concurrency=options['workers'], pool='threads', perform_ping_check=False, loglevel='WARNING') \
+            if options['mode'] == 'worker' else nullcontext()
+
+        task_prerun.connect(on_task_prerun, weak=False, dispatch_uid='BENCHMARK_TASK_PRERUN')
+        task_postrun.connect(on_task_postrun, weak=False, dispatch_uid='BENCHMARK_TASK_POSTRUN')
+        started_at = datetime.now(timezone.utc)
+        usage_before = resource.getrusage(resource.RUSAGE_SELF)
+
+        try:
+            with worker, queries.installed(), instrument_functions(tasks, TASK_STAGES, recorder), \
+                    count_method_calls(type(celery_app.backend), RESULT_BACKEND_METHODS, backend_ops):
+                started = time.perf_counter()
+
+                with open(zip_path, 'rb') as f, recorder.measure('zip_validation'):
+                    zip_file_store = ZipFileStore(zip_file=File(f, name='synthetic.zip'))
+                    zip_file_store.full_clean()
+                    zip_file_store.save()
+
+                batch_size = options['batch_size'] or settings.BULK_UPLOAD_BATCH_SIZE
+                with lock:
+                    expected_batches = math.ceil(len(zip_file_store.manifest) / batch_size)
+                    if finished_batches >= expected_batches:
+                        all_finished.set()
+
+                with recorder.measure('dispatch'):
+                    process = BulkUploadProcess.upload_procedures.bulk_upload(zip_file_store, batch_size=batch_size)
+
+                if not all_finished.wait(options['timeout']):
+                    raise CommandError(f"Only {finished_batches} of {expected_batches} batches finished within {options['timeout']} seconds.")
+
+                elapsed = time.perf_counter() - started
+        finally:
+            task_prerun.disconnect(dispatch_uid='BENCHMARK_TASK_PRERUN') # type: ignore[attr-defined]
+            task_postrun.disconnect(dispatch_uid='BENCHMARK_TASK_POSTRUN') # type: ignore[attr-defined]
+
+        usage_after = resource.getrusage(resource.RUSAGE_SELF)
+        process.refresh_from_db()
+
+        return {
+            'benchmark': 'bulk_ingest',
+            'started_at': started_at.isoformat(),
+            'parameters': {
+                'count': options['count'],
+                'resolutions': [f'{width}x{height}' for width, height in options['resolutions']],
+                'invalid_ratio': options['invalid_ratio'],
+                'batch_size': batch_size,
+                'mode': options['mode'],
+                'workers': options['workers'] if options['mode'] == 'worker' else 0,
+                'broker': 'redis' if options['redis_url'] else 'memory',
+                'seed': options['seed'],
+            },
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'django': version('django'),
+                'celery': version('celery'),
+                'pillow': version('pillow'),
+                'database': connections[DEFAULT_DB_ALIAS].vendor,
+            },
+            'files': {
+                'total': process.total_files,
+                'finished': process.finished_files,
+                'failed': process.failed_files,
+                'generated': {str(kind): kinds[kind] for kind in SyntheticFileKind},
+                'zip_bytes': os.path.getsize(zip_path),
+            },
+            'elapsed_seconds': elapsed,
+            'files_per_second': process.finished_files / elapsed,
+            'stages': recorder.summary(),
+            'peak_rss_kb': _peak_rss_kb(),
+            'cpu_seconds': {
+                'user': usage_after.ru_utime - usage_before.ru_utime,
+                'system': usage_after.ru_stime - usage_before.ru_stime,
+            },
+            'db_queries': {'total': sum(queries.counts.values()), **queries.counts},
+            'result_backend_ops': {'total': sum(backend_ops.values()), **backend_ops},
+        }
+
+
+    def _write_report(self, report: dict[str, Any], output: str | None) -> None:
+        if output == '-':
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        if output is not None:
+            with open(output, 'w') as f:
+                json.dump(report, f, indent=2)
+
+        files = report['files']
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {files['finished']}/{files['total']} files ({files['failed']} failed) in {report['elapsed_seconds']:.2f}s, "
+            f"{report['files_per_second']:.2f} files/s"
+        ))
+        for stage, latency in report['stages'].items():
+            self.stdout.write(f"   {stage:<16} n={latency['count']:<6} p50={latency['p50_ms']:9.2f}ms p99={latency['p99_ms']:9.2f}ms")
+        self.stdout.write(
+            f"   peak rss={report['peak_rss_kb'] // 1024}MB queries={report['db_queries']['total']} "
+            f"result backend ops={report['result_backend_ops']['total']}"
+        )
+        if output is not None:
+            self.stdout.write(self.style.SUCCESS(f"📝 Report written to {output}"))
@@ -0,0 +1,66 @@
+from argparse import ArgumentParser
+import os
+import time
+from typing import Any
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from common.management.commands._orphan_files import (
+    external_sorted,
+    file_fields,
+    referenced_names,
+    scan_files,
+    sorted_difference,
+    upload_directories,
+)
+
+
+class Command(BaseCommand):
+    help = "Delete the files under the upload directories of MEDIA_ROOT that no file field references. The media tree and the referenced names are both streamed in sorted order and compared in a single merge, in bounded memory."
+
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument('--dry-run', action='store_true', help="List the orphans without deleting them.")
+        parser.add_argument('--min-age', type=float, default=24 * 60 * 60, help="Seconds since the last modification before a file may be deleted, it protects uploads whose row is not committed yet.")
+        parser.add_argument('--rate', type=float, default=None, help="Maximum deletions per second, unlimited by default.")
+        parser.add_argument('--chunk-size', type=int, default=100_000, help="Names sorted in memory at once and fetched from the database per query.")
+
+
+    def handle(self, *args: str, **options: Any) -> None:
+        if options['min_age'] < 0 or options['chunk_size'] < 1 or (options['rate'] is not None and options['rate'] <= 0):
+            raise CommandError("The minimum age must not be negative, the chunk size and the rate must be positive.")
+
+        root = str(settings.MEDIA_ROOT)
+        fields = file_fields()
+        directories = upload_directories(fields)
+        modified_before = time.time() - options['min_age']
+
+        self.stdout.write(self.style.HTTP_INFO(f"🔎 Looking for orphans in {', '.join(directories)}..."))
+        scanned = external_sorted(scan_files(root, directories, modified_before), options['chunk_size'])
+        orphans = sorted_difference(scanned, referenced_names(fields, options['chunk_size']))
+
+        count = size = 0
+        interval = 0 if options['rate'] is None else 1 / options['rate']
+        next_deletion_at = time.monotonic()
+
+        for name in orphans:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+                # touched since the scan
+                if stat.st_mtime >= modified_before:
+                    continue
+
+                if not options['dry_run']:
+                    time.sleep(max(0, next_deletion_at - time.monotonic()))
+                    next_deletion_at = max(next_deletion_at, time.monotonic()) + interval
+                    os.remove(path)
+            except FileNotFoundError:
+                continue
+
+            count += 1
+            size += stat.st_size
+            if options['verbosity'] > 1 or options['dry_run']:
+                self.stdout.write(name)
+
+        verb = "Found" if options['dry_run'] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"✅ {verb} {count} orphan files, {size / 1024 / 1024:.2f}MB."))
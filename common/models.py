@@ -1,12 +1,110 @@
+from collections.abc import Collection, Iterable
+from concurrent.futures import ThreadPoolExecutor
+import functools
+from typing import Any, Self
 import uuid
-from django.db import models
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+from django.db.models.base import ModelBase
 from django_stubs_ext.db.models import TypedModelMeta
 
 
+@functools.cache
+def _file_field_attnames(model: type[models.Model]) -> tuple[str, ...]:
+    return tuple(field.attname for field in model._meta.get_fields() if isinstance(field, models.FileField))
+
+
 class AbstractBaseModel(models.Model):
     uuid = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
     objects: models.Manager["AbstractBaseModel"] = models.Manager()
 
+    # names of the stored files as last loaded or saved, by attname, so a replaced file is found without a query
+    file_names_snapshot: dict[str, str | None]
+
     class Meta(TypedModelMeta):
         abstract = True
+
+
+    @classmethod
+    def from_db(cls, db: str | None, field_names: Collection[str], values: Collection[Any]) -> Self:
+        instance = super().from_db(db, field_names, values)
+        instance.snapshot_file_names()
+        return instance
+
+
+    def refresh_from_db(self, using: str | None = None, fields: Iterable[str] | None = None, from_queryset: models.QuerySet[Self] | None = None) -> None:
+        fields = None if fields is None else list(fields)
+        super().refresh_from_db(using, fields, from_queryset)
+        self.snapshot_file_names(fields)
+
+
+    def save_base(
+        self,
+        raw: bool = False,
+        force_insert: bool | tuple[ModelBase, ...] = False,
+        force_update: bool = False,
+        using: str | None = None,
+        update_fields: Iterable[str] | None = None,
+    ) -> None:
+        update_fields = None if update_fields is None else list(update_fields)
+        super().save_base(raw, force_insert, force_update, using, update_fields)
+        self.snapshot_file_names(update_fields)
+
+
+    def snapshot_file_names(self, fields: Iterable[str] | None = None) -> None:
+        """Remember the names of the loaded file fields, all of them or only those among `fields`."""
+        snapshot = self.__dict__.setdefault('file_names_snapshot', {})
+        fields = None if fields is None else set(fields)
+        for attname in _file_field_attnames(type(self)):
+            if attname in self.__dict__ and (fields is None or attname in fields):
+                snapshot[attname] = getattr(self, attname).name
+
+
+def _delete_stored_file(name: str) -> bool:
+    try:
+        default_storage.delete(name)
+    except OSError:
+        return False
+    return True
+
+
+class _FileDeletionManager(models.Manager["FileDeletion"]):
+
+    def journal(self, names: Iterable[str]) -> None:
+        self.bulk_create([FileDeletion(name=name) for name in names])
+
+
+    def drain(self, batch_size: int, workers: int) -> int:
+        """Delete the journaled files a batch at a time across a thread pool, return how many were deleted.
+
+        Batches are claimed with `SKIP LOCKED` where the database supports it, so concurrent drains share the
+        work. Files that could not be deleted stay journaled for the next drain.
+        """
+        deleted = 0
+        last_id = 0
+
+        with ThreadPoolExecutor(workers) as executor:
+            while True:
+                with transaction.atomic():
+                    batch = list(
+                        self.select_for_update(skip_locked=True).filter(id__gt=last_id).order_by('id').only('id', 'name')[:batch_size]
+                    )
+                    if not batch:
+                        return deleted
+
+                    last_id = batch[-1].id
+                    results = executor.map(_delete_stored_file, [entry.name for entry in batch])
+                    done = [entry.id for entry, result in zip(batch, results) if result]
+                    self.filter(id__in=done).delete()
+
+                deleted += len(done)
+
+
+class FileDeletion(models.Model):
+    """A file of the default storage to delete once the transaction that released it has committed."""
+
+    name = models.CharField(max_length=256)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = _FileDeletionManager()
@@ -0,0 +1,73 @@
+from functools import lru_cache
+from itertools import combinations
+from typing import IO
+import numpy as np
+from PIL import Image
+
+
+HASH_BITS = 64
+
+BAND_COUNT = 4
+
+BAND_BITS = HASH_BITS // BAND_COUNT
+
+_DHASH_SIZE = 8
+
+# past this radius per band the candidate lists outgrow a full scan
+_MAX_BAND_DISTANCE = 2
+
+
+def dhash(image_file: IO[bytes]) -> int:
+    """64-bit difference hash of the image, one bit per horizontally adjacent pair of an 9x8 grayscale thumbnail.
+
+    JPEGs are DCT-scaled while decoding, the hash only needs a few pixels per cell of the grid.
+    """
+    with Image.open(image_file) as img:
+        img.draft('L', (_DHASH_SIZE * 8, _DHASH_SIZE * 8))
+        thumbnail = img.convert('L').resize((_DHASH_SIZE + 1, _DHASH_SIZE), Image.Resampling.BOX)
+
+    pixels = np.asarray(thumbnail, dtype=np.int16)
+    bits = pixels[:, 1:] > pixels[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def to_signed(perceptual_hash: int) -> int:
+    """The unsigned hash as a signed 64-bit integer, the range of a database bigint."""
+    return perceptual_hash - (1 << HASH_BITS) if perceptual_hash >= 1 << (HASH_BITS - 1) else perceptual_hash
+
+
+def to_unsigned(perceptual_hash: int) -> int:
+    return perceptual_hash & ((1 << HASH_BITS) - 1)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (to_unsigned(a) ^ to_unsigned(b)).bit_count()
+
+
+def split_bands(perceptual_hash: int) -> tuple[int, ...]:
+    """The hash cut into `BAND_COUNT` bands of `BAND_BITS` bits, most significant first."""
+    perceptual_hash = to_unsigned(perceptual_hash)
+    mask = (1 << BAND_BITS) - 1
+    return tuple((perceptual_hash >> (BAND_BITS * (BAND_COUNT - 1 - index))) & mask for index in range(BAND_COUNT))
+
+
+@lru_cache(maxsize=None)
+def _flip_masks(max_distance: int) -> tuple[int, ...]:
+    return tuple(
+        sum(1 << bit for bit in bits)
+        for distance in range(max_distance + 1)
+        for bits in combinations(range(BAND_BITS), distance)
+    )
+
+
+def band_candidates(perceptual_hash: int, max_distance: int) -> list[list[int]] | None:
+    """Multi-index hashing: the values each band of a matching hash may take, None when the radius is too wide to be worth it.
+
+    Two hashes within `max_distance` bits differ in at least one band by at most `max_distance // BAND_COUNT`
+    bits, so looking every band up among its neighbours within that radius finds every match.
+    """
+    if max_distance // BAND_COUNT > _MAX_BAND_DISTANCE:
+        return None
+
+    masks = _flip_masks(max_distance // BAND_COUNT)
+    return [[band ^ mask for mask in masks] for band in split_bands(perceptual_hash)]
@@ -1,9 +1,14 @@
+import functools
+import math
+import threading
+import time
+import weakref
 from typing import Any, cast
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 from django.db.models.fields.files import FieldFile
 from enum import StrEnum, auto
-from common.models import AbstractBaseModel
-from django.core.exceptions import ObjectDoesNotExist
+from common.models import AbstractBaseModel, FileDeletion
 
 
 class SignalEffect(StrEnum):
@@ -11,22 +16,118 @@ class SignalEffect(StrEnum):
     AUTO_DELETE_OLD_FILE = auto()
 
 
+_drain_requested_at = -math.inf
+
+
+def _request_drain() -> None:
+    from common.tasks import drain_file_deletions
+
+    # the commit hooks of a bulk delete all land here, one task drains them all
+    global _drain_requested_at
+    now = time.monotonic()
+    if now - _drain_requested_at >= settings.FILE_DELETION_DRAIN_DEBOUNCE:
+        _drain_requested_at = now
+        drain_file_deletions.delay()
+
+
+class _FileDeletionJournalHook:
+    """Journal the names released under one savepoint of a transaction with a single INSERT once it commits."""
+
+    def __init__(self, key: tuple[str, tuple[str, ...]]) -> None:
+        self.key = key
+        self.names: list[str] = []
+
+
+    def __call__(self) -> None:
+        if _pending_journal_hooks.hooks.get(self.key) is self:
+            del _pending_journal_hooks.hooks[self.key]
+        FileDeletion.objects.journal(self.names)
+        _request_drain()
+
+
+class _PendingJournalHooks(threading.local):
+
+    def __init__(self) -> None:
+        # a rollback drops the hooks of its savepoints, and their names, from the connection and thus from here
+        self.hooks: weakref.WeakValueDictionary[tuple[str, tuple[str, ...]], _FileDeletionJournalHook] = weakref.WeakValueDictionary()
+
+
+_pending_journal_hooks = _PendingJournalHooks()
+
+
+def _journal_file_deletions(names: list[str]) -> None:
+    """Journal the files once the current transaction commits, they stay in place if it rolls back.
+
+    The names of a whole `QuerySet.delete()` share one commit hook and are journaled with one INSERT.
+    A crash between the commit and the hook leaves orphans for the `deleteorphanfiles` command.
+    """
+    if not names:
+        return
+
+    connection = transaction.get_connection()
+    key = connection.alias, tuple(connection.savepoint_ids)
+    hook = _pending_journal_hooks.hooks.get(key)
+
+    if hook is not None:
+        hook.names.extend(names)
+        return
+
+    hook = _FileDeletionJournalHook(key)
+    hook.names.extend(names)
+    _pending_journal_hooks.hooks[key] = hook
+    transaction.on_commit(hook, robust=True)
+
+
 def delete_file_post_delete_function(sender: type[AbstractBaseModel], **kwargs: Any) -> None: 
     instance = cast(AbstractBaseModel, kwargs['instance'])
+    names = []
     for file_field in instance._meta.get_fields():
         if isinstance(file_field, models.FileField) and SignalEffect.AUTO_DELETE_FILE in file_field.verbose_name:
             file = cast(FieldFile, getattr(instance, file_field.get_attname()))
-            file.delete(save=False)
-        
+            if file:
+                names.append(cast(str, file.name))
+    _journal_file_deletions(names)
+
+
+@functools.cache
+def _auto_delete_old_file_fields(model: type[AbstractBaseModel]) -> tuple[models.FileField, ...]:
+    return tuple(
+        field for field in model._meta.get_fields()
+        if isinstance(field, models.FileField) and SignalEffect.AUTO_DELETE_OLD_FILE in field.verbose_name
+    )
+
 
-def delete_old_file_pre_save_function(sender: type[AbstractBaseModel], **kwargs: Any) -> None:
+def _saved_auto_delete_old_file_fields(sender: type[AbstractBaseModel], update_fields: frozenset[str] | None) -> list[models.FileField]:
+    return [field for field in _auto_delete_old_file_fields(sender) if update_fields is None or field.name in update_fields]
+
+
+def snapshot_old_file_pre_save_function(sender: type[AbstractBaseModel], **kwargs: Any) -> None:
+    """Fetch the stored names missing from the snapshot, those of fields deferred when the instance was loaded."""
     instance = cast(AbstractBaseModel, kwargs['instance'])
-    for file_field in instance._meta.get_fields():
-        if isinstance(file_field, models.FileField) and SignalEffect.AUTO_DELETE_OLD_FILE in file_field.verbose_name:
-            current_file = cast(FieldFile, getattr(instance, file_field.get_attname()))
-            try:
-                old_file = cast(FieldFile, getattr(sender.objects.get(pk=instance.pk), file_field.get_attname()))
-            except ObjectDoesNotExist:
-                return
-            if current_file.name != old_file.name:
-                old_file.delete(save=False)
+    if instance._state.adding:
+        return
+
+    snapshot = instance.__dict__.setdefault('file_names_snapshot', {})
+    missing = [
+        field.get_attname() for field in _saved_auto_delete_old_file_fields(sender, kwargs['update_fields'])
+        if field.get_attname() not in snapshot
+    ]
+    if missing:
+        stored_names = sender.objects.filter(pk=instance.pk).values(*missing).first()
+        if stored_names is not None:
+            snapshot.update(stored_names)
+
+
+def delete_old_file_post_save_function(sender: type[AbstractBaseModel], **kwargs: Any) -> None:
+    if kwargs['created']:
+        return
+
+    instance = cast(AbstractBaseModel, kwargs['instance'])
+    snapshot = instance.__dict__.get('file_names_snapshot', {})
+    names = []
+    for file_field in _saved_auto_delete_old_file_fields(sender, kwargs['update_fields']):
+        old_name = snapshot.get(file_field.get_attname())
+        current_file = cast(FieldFile, getattr(instance, file_field.get_attname()))
+        if old_name and current_file.name != old_name:
+            names.append(old_name)
+    _journal_file_deletions(names)
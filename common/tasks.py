@@ -0,0 +1,9 @@
+from celery import shared_task, Task
+from django.conf import settings
+
+
+@shared_task(bind=True, ignore_result=True, acks_late=False)
+def drain_file_deletions(self: Task[[], int]) -> int:
+    from common.models import FileDeletion
+
+    return FileDeletion.objects.drain(settings.FILE_DELETION_BATCH_SIZE, settings.FILE_DELETION_WORKERS)
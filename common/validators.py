@@ -1,13 +1,15 @@
 from collections.abc import Sequence
 from dataclasses import dataclass
-from pathlib import PurePath
+from pathlib import PurePath, PurePosixPath
+import struct
 from typing import ClassVar, Literal, cast
+import zipfile
 from django.utils.deconstruct import deconstructible
 from django.db.models.fields.files import FieldFile, ImageFieldFile
 from django.core.exceptions import ValidationError
-from common.image_utils import ImageFormat, get_file_extensions_for_image_format
-from PIL import Image
-from django.core.files.images import ImageFile
+from common.image_utils import ImageFormat, get_attached_image_probe, get_file_extensions_for_image_format, get_image_probe
+from common.zip_utils import get_zip_archive
+from PIL import UnidentifiedImageError
 
 
 @deconstructible
@@ -26,7 +28,10 @@ class MaxFileSizeValidator:
         
 
     def __call__(self, value: FieldFile) -> None:
-        if value.size > self.max_file_size:
+        probe = get_attached_image_probe(value)
+        file_size = value.size if probe is None else probe.file_size
+
+        if file_size > self.max_file_size:
             raise ValidationError(
                 "Ensure that the file size is less than or equal to %(max_size)s bytes.",
                 code='file_too_large',
@@ -42,9 +47,10 @@ class ImageFormatAndFileExtensionsValidator:
 
 
     def __call__(self, value: ImageFieldFile) -> None:
-        image_file = cast(ImageFile, value.file)
-        with Image.open(image_file) as img:
-            image_format = str(img.format)
+        try:
+            image_format = get_image_probe(value).format
+        except UnidentifiedImageError:
+            image_format = None
         
         if image_format not in self.image_formats:
             raise ValidationError(
@@ -53,10 +59,106 @@ class ImageFormatAndFileExtensionsValidator:
                 params={'formats': str(tuple([str(format) for format in self.image_formats]))}
             )
 
-        extensions = get_file_extensions_for_image_format(ImageFormat[image_format])
+        extensions = get_file_extensions_for_image_format(ImageFormat[cast(str, image_format)])
         if PurePath(value.path).suffix not in extensions:
             raise ValidationError(
                 "Ensure the image file has a valid extension(e.g. %(extensions)s) corresponding to its format: %(format)s.",
                 code='mismatch_between_image_file_extension_and_format',
                 params={'extensions': str(extensions), 'format': image_format}
             )
+
+
+@deconstructible
+@dataclass
+class ZipArchiveValidator:
+    """Reject hostile archives from their central directory alone, before any member is decompressed."""
+
+    max_members: int
+    max_total_size: int
+    max_compression_ratio: int
+
+    _supported_compress_types: ClassVar[frozenset[int]] = frozenset((zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2, zipfile.ZIP_LZMA))
+    _local_header: ClassVar[struct.Struct] = struct.Struct('<4s22xHH') # signature, then the name and extra field lengths
+    _local_header_signature: ClassVar[bytes] = b'PK\x03\x04'
+
+
+    def __call__(self, value: FieldFile) -> None:
+        try:
+            archive = get_zip_archive(value)
+        except (zipfile.BadZipFile, OSError, ValueError):
+            raise ValidationError(
+                'Invalid zip file.',
+                code='invalid_zip_file'
+            )
+
+        members = archive.infolist()
+
+        if len(members) > self.max_members:
+            raise ValidationError(
+                "Ensure the zip file has at most %(max_members)s members, it has %(members)s.",
+                code='too_many_members_in_zip_file',
+                params={'max_members': str(self.max_members), 'members': str(len(members))}
+            )
+
+        if sum(member.file_size for member in members) > self.max_total_size:
+            raise ValidationError(
+                "Ensure the uncompressed size of the zip file is less than or equal to %(max_size)s bytes.",
+                code='zip_file_too_large_uncompressed',
+                params={'max_size': str(self.max_total_size)}
+            )
+
+        end_of_previous = 0
+        for member in sorted(members, key=lambda member: member.header_offset):
+            self._validate_member(member)
+            data_offset = member.header_offset + self._read_local_header_size(value, member)
+
+            # members sharing their compressed data are the building block of non-recursive zip bombs
+            if member.header_offset < end_of_previous:
+                raise ValidationError(
+                    "Overlapping member found in zip: %(bad_file)s",
+                    code='overlapping_member_in_zip_file',
+                    params={'bad_file': member.filename}
+                )
+            end_of_previous = data_offset + member.compress_size
+
+
+    def _read_local_header_size(self, value: FieldFile, member: zipfile.ZipInfo) -> int:
+        """The size of the local header of the member, with its own name and extra field which may differ from the central directory."""
+        file = value.file
+        file.seek(member.header_offset)
+        header = file.read(self._local_header.size)
+
+        if len(header) < self._local_header.size or header[:4] != self._local_header_signature:
+            raise ValidationError(
+                "Invalid local header found in zip: %(bad_file)s",
+                code='invalid_local_header_in_zip_file',
+                params={'bad_file': member.filename}
+            )
+
+        _, name_length, extra_length = self._local_header.unpack(header)
+        return cast(int, self._local_header.size + name_length + extra_length)
+
+
+    def _validate_member(self, member: zipfile.ZipInfo) -> None:
+        path = PurePosixPath(member.filename)
+
+        if path.is_absolute() or '..' in path.parts:
+            raise ValidationError(
+                "Unsafe path found in zip: %(bad_file)s",
+                code='unsafe_path_in_zip_file',
+                params={'bad_file': member.filename}
+            )
+
+        if member.flag_bits & 0x1 or member.compress_type not in self._supported_compress_types:
+            raise ValidationError(
+                "Encrypted or unsupported compressed file found in zip: %(bad_file)s",
+                code='unsupported_member_in_zip_file',
+                params={'bad_file': member.filename}
+            )
+
+        if member.file_size > max(member.compress_size, 1) * self.max_compression_ratio:
+            raise ValidationError(
+                "Suspicious compression ratio found in zip: %(bad_file)s",
+                code='suspicious_compression_ratio_in_zip_file',
+                params={'bad_file': member.filename}
+            )
@@ -0,0 +1,195 @@
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import hashlib
+import os
+from pathlib import PurePosixPath
+from tempfile import SpooledTemporaryFile
+import threading
+import time
+from typing import IO, NamedTuple
+import zipfile
+from django.db.models.fields.files import FieldFile
+
+
+_SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+class ZipManifestEntry(NamedTuple):
+    name: str
+    header_offset: int
+    compress_size: int
+    file_size: int
+    crc: int
+    compress_type: int
+    flag_bits: int
+
+
+    @classmethod
+    def from_zip_info(cls, info: zipfile.ZipInfo) -> "ZipManifestEntry":
+        return cls(info.orig_filename, info.header_offset, info.compress_size, info.file_size, info.CRC, info.compress_type, info.flag_bits)
+
+
+    def to_zip_info(self) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo(self.name)
+        info.header_offset = self.header_offset
+        info.compress_size = self.compress_size
+        info.file_size = self.file_size
+        info.CRC = self.crc
+        info.compress_type = self.compress_type
+        info.flag_bits = self.flag_bits
+        return info
+
+
+def build_zip_manifest(zip_file: zipfile.ZipFile, file_extensions: Iterable[str]) -> list[ZipManifestEntry]:
+    """Index the members of the zip file having one of the file extensions in a single pass over its central directory.
+
+    The entries are de-duplicated by name, the last record of the central directory wins just like in `ZipFile.getinfo`.
+    """
+    file_extensions = frozenset(file_extensions)
+    entries: dict[str, ZipManifestEntry] = {}
+
+    for info in zip_file.infolist():
+        if info.is_dir() or PurePosixPath(info.filename).suffix not in file_extensions:
+            continue
+        entries[info.filename] = ZipManifestEntry.from_zip_info(info)
+
+    return list(entries.values())
+
+
+def load_zip_manifest(rows: Sequence[Sequence[str | int]]) -> list[ZipManifestEntry]:
+    return [ZipManifestEntry(*row) for row in rows] # type: ignore[arg-type]
+
+
+def open_zip_manifest_entry(zip_file: zipfile.ZipFile, entry: ZipManifestEntry) -> IO[bytes]:
+    """Open the member at its recorded offset without looking its name up in the central directory."""
+    return zip_file.open(entry.to_zip_info())
+
+
+def spool_zip_manifest_entry(zip_file: zipfile.ZipFile, entry: ZipManifestEntry, max_memory_size: int) -> tuple[SpooledTemporaryFile[bytes], str]:
+    """Copy the member into a temporary file, in memory up to `max_memory_size` bytes and on disk past it, and hash it with SHA-256 on the way.
+
+    The member is decompressed in chunks and never past its declared size, its CRC is checked once it is
+    completely read, so a corrupted member raises `zipfile.BadZipFile` here rather than halfway through a save.
+    """
+    spooled_file: SpooledTemporaryFile[bytes] = SpooledTemporaryFile(max_size=max_memory_size)
+    digest = hashlib.sha256()
+
+    try:
+        with open_zip_manifest_entry(zip_file, entry) as member:
+            while chunk := member.read(_SPOOL_CHUNK_SIZE):
+                digest.update(chunk)
+                spooled_file.write(chunk)
+    except BaseException:
+        spooled_file.close()
+        raise
+
+    spooled_file.seek(0)
+    return spooled_file, digest.hexdigest()
+
+
+def get_zip_archive(value: FieldFile) -> zipfile.ZipFile:
+    """Read the central directory of the file of the field once and attach the archive to it, the members are not decompressed.
+
+    The archive is tied to the underlying file object and is read again if another file is assigned.
+    """
+    file = value.file
+    attached = getattr(value, '_zip_archive', None)
+
+    if attached is not None and attached[0] is file:
+        return attached[1] # type: ignore[no-any-return]
+
+    archive = zipfile.ZipFile(file)
+    value._zip_archive = file, archive # type: ignore[attr-defined]
+    return archive
+
+
+@dataclass(eq=False)
+class _CachedZipFile:
+    zip_file: zipfile.ZipFile
+    users: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+    evicted: bool = False
+
+
+class ZipFileCache:
+    """Bounded LRU cache of open zip files keyed by path and modification time.
+
+    Each process keeps its own handles, the cache is emptied in a forked child and is guarded by a lock
+    for threaded pools. A handle in use is only closed once its last user releases it.
+    """
+
+    def __init__(self, max_size: int, idle_timeout: float) -> None:
+        if max_size < 1:
+            raise ValueError(f"The max_size ({max_size}) must be a positive integer.")
+
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+
+    def _reset(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, int], _CachedZipFile] = OrderedDict()
+        self._sweeper: threading.Timer | None = None
+
+
+    @contextmanager
+    def open(self, path: str) -> Iterator[zipfile.ZipFile]:
+        key = path, os.stat(path).st_mtime_ns
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                cached = self._entries[key] = _CachedZipFile(zipfile.ZipFile(path))
+            self._entries.move_to_end(key)
+            cached.users += 1
+            self._evict(over_capacity=True)
+
+        try:
+            yield cached.zip_file
+        finally:
+            with self._lock:
+                cached.users -= 1
+                cached.last_used = time.monotonic()
+                if cached.evicted and cached.users == 0:
+                    cached.zip_file.close()
+                self._schedule_sweep()
+
+
+    def evict_idle(self) -> None:
+        with self._lock:
+            self._sweeper = None
+            self._evict(over_capacity=False)
+            self._schedule_sweep()
+
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in [*self._entries]:
+                self._discard(key)
+
+
+    def _evict(self, over_capacity: bool) -> None:
+        deadline = time.monotonic() - self.idle_timeout
+        for key, cached in [*self._entries.items()]:
+            if cached.last_used <= deadline and cached.users == 0:
+                self._discard(key)
+            elif over_capacity and len(self._entries) > self.max_size:
+                self._discard(key)
+
+
+    def _discard(self, key: tuple[str, int]) -> None:
+        cached = self._entries.pop(key)
+        cached.evicted = True
+        if cached.users == 0:
+            cached.zip_file.close()
+
+
+    def _schedule_sweep(self) -> None:
+        if self._sweeper is None and any(self._entries):
+            self._sweeper = threading.Timer(self.idle_timeout, self.evict_idle)
+            self._sweeper.daemon = True
+            self._sweeper.start()
@@ -77,6 +77,8 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'project.wsgi.application'
 
+ASGI_APPLICATION = 'project.asgi.application'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
@@ -89,6 +91,23 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/1',
+    }
+}
+
+# Seconds between two checks of the shared version of process-local caches
+PROCESS_CACHE_CHECK_INTERVAL = 1
+
+# Seconds after which the cached SettingsStore is reloaded even if it was not invalidated
+SETTINGS_STORE_CACHE_TTL = 60
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -146,6 +165,103 @@ MAX_FILE_SIZE = 5 * mb
 
 MAX_BULK_UPLOAD_SIZE = 500 * mb
 
+# well above the 20k images a bulk upload is meant to carry
+ZIP_MAX_MEMBERS = 50_000
+
+ZIP_MAX_UNCOMPRESSED_SIZE = 2 * 1024 * mb
+
+ZIP_MAX_COMPRESSION_RATIO = 100
+
+ZIP_MEMBER_SPOOL_SIZE = 16 * mb
+
+# resumable uploads of zip files, written in chunks straight to their place in MEDIA_ROOT
+ZIP_FILE_UPLOAD_MAX_CHUNK_SIZE = 32 * mb
+
+ZIP_FILE_UPLOAD_LIFETIME = 24 * 60 * 60
+
+ZIP_FILE_UPLOAD_CLEANUP_INTERVAL = 60 * 60
+
+ZIP_FILE_UPLOAD_HASH_CACHE_SIZE = 64
+
+WALLPAPER_RENDITION_WIDTHS = (320, 640, 1280)
+
+NEAR_DUPLICATE_MAX_DISTANCE = 6
+
+SIMILAR_WALLPAPERS_MAX_DISTANCE = 10
+
+SIMILAR_WALLPAPERS_LIMIT = 20
+
+WALLPAPER_GALLERY_PAGE_SIZE = 24
+
+
+# Bulk upload
+
+BULK_UPLOAD_BATCH_SIZE = 64
+
+# the rows of a batch are committed every so many files or seconds, whichever comes first
+BULK_UPLOAD_WRITE_BATCH_SIZE = 16
+
+BULK_UPLOAD_WRITE_INTERVAL = 5
+
+# a batch is retried when the database is busy, its committed entries are skipped
+BULK_UPLOAD_MAX_RETRIES = 3
+
+# seconds the seen entries of a process are kept, longer than a batch can wait for a redelivery
+BULK_UPLOAD_ENTRY_LIFETIME = 24 * 60 * 60
+
+BULK_UPLOAD_ENTRY_CLEANUP_INTERVAL = 60 * 60
+
+# seconds between the checks for running processes that stopped making progress
+BULK_UPLOAD_STALE_CHECK_INTERVAL = 60 * 60
+
+# seconds between the checks a running batch makes for the cancellation of its process
+BULK_UPLOAD_CANCEL_CHECK_INTERVAL = 2
+
+BULK_UPLOAD_PROCESSES_PER_PAGE = 20
+
+BULK_UPLOAD_STREAM_INTERVAL = 1
+
+BULK_UPLOAD_STREAM_KEEP_ALIVE = 15
+
+BULK_UPLOAD_STREAM_OVERLAP = 2
+
+BULK_UPLOAD_STREAM_RETRY = 3
+
+ZIP_FILE_CACHE_SIZE = 4
+
+ZIP_FILE_CACHE_IDLE_TIMEOUT = 60
+
+
+# Downloads
+
+DOWNLOAD_COUNTS_REDIS_URL = 'redis://localhost:6379/1'
+
+DOWNLOAD_COUNTS_FLUSH_INTERVAL = 30
+
+DOWNLOAD_COUNTS_FLUSH_LOCK_TIMEOUT = 300
+
+DOWNLOAD_COUNTS_FLUSH_BATCH_SIZE = 500
+
+POPULAR_WALLPAPERS_LIMIT = 24
+
+# None to stream the files from Django, 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache, lighttpd) to hand them to the front server
+SENDFILE_BACKEND: str | None = None
+
+# internal nginx location aliased to MEDIA_ROOT, for 'x-accel-redirect'
+SENDFILE_URL_PREFIX = '/protected-media/'
+
+
+# File deletions
+
+# the journal is drained after every commit that released files, at most once per debounce seconds, and on this interval
+FILE_DELETION_DRAIN_INTERVAL = 60
+
+FILE_DELETION_DRAIN_DEBOUNCE = 1
+
+FILE_DELETION_BATCH_SIZE = 500
+
+FILE_DELETION_WORKERS = 8
+
 
 # Distributed Task Queue
 
@@ -153,6 +269,9 @@ CELERY_BROKER_URL = 'redis://localhost:6379'
 
 CELERY_RESULT_BACKEND = 'redis://localhost:6379'
 
+# the bulk uploads keep their progress and outcome in the database, results only serve callers waiting on them
+CELERY_RESULT_EXPIRES = 60 * 60
+
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
 
 CELERY_TASK_ACKS_LATE = True
@@ -161,6 +280,29 @@ CELERY_TASK_TRACK_STARTED = True
 
 CELERY_WORKER_POOL_RESTARTS = True
 
+CELERY_BEAT_SCHEDULE = {
+    'flush-download-counts': {
+        'task': 'app.tasks.flush_download_counts',
+        'schedule': DOWNLOAD_COUNTS_FLUSH_INTERVAL,
+    },
+    'drain-file-deletions': {
+        'task': 'common.tasks.drain_file_deletions',
+        'schedule': FILE_DELETION_DRAIN_INTERVAL,
+    },
+    'delete-expired-bulk-upload-entries': {
+        'task': 'app.tasks.delete_expired_bulk_upload_entries',
+        'schedule': BULK_UPLOAD_ENTRY_CLEANUP_INTERVAL,
+    },
+    'fail-stale-bulk-upload-processes': {
+        'task': 'app.tasks.fail_stale_bulk_upload_processes',
+        'schedule': BULK_UPLOAD_STALE_CHECK_INTERVAL,
+    },
+    'delete-expired-zip-file-uploads': {
+        'task': 'app.tasks.delete_expired_zip_file_uploads',
+        'schedule': ZIP_FILE_UPLOAD_CLEANUP_INTERVAL,
+    },
+}
+
 
 # Forms
 